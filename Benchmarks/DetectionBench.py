@@ -0,0 +1,287 @@
+# DetectionBench.py - Latency, scaling and memory of the detection hot paths
+#
+# Benchmarks main.find_bobber, main.detect_splash and Core/AutoFish.find_target_color
+# against the bundled bobber_templates/ and saved frames (latest_cast.png), and
+# writes machine-readable results so versions can be compared. Run from the project root:
+#   python -m Benchmarks.DetectionBench --json bench.json
+#   python -m Benchmarks.DetectionBench --counts 100 400 --compare bench.json
+#   python -m Benchmarks.DetectionBench --counts 850 --workers 1 2 4 --modes full
+#   python -m Benchmarks.DetectionBench --bobber 252,266
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import cv2
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import main as fishing_bot
+from Core import AutoFish
+from Core.TemplateBank import TemplateBank
+from Core.TemplateLibrary import TemplateLibrary
+from Core.MatchPool import MatchPool
+from Core.EventLog import setup_logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# "full" matches every template (how cost scales with the library); "early" is the bot's
+# EARLY_EXIT_SCORE, which stops after a few agreeing templates whatever the count
+MODES = {"full": 0, "early": fishing_bot.EARLY_EXIT_SCORE}
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1e3
+    return {
+        "calls": len(samples),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def measure(fn, calls, warmup=1):
+    """
+    Time `calls` calls of fn (stdout silenced), then trace one more call for its memory peak.
+    """
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        for _ in range(warmup):
+            fn()
+        samples = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+            sink.seek(0)
+            sink.truncate()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    stats = percentiles(samples)
+    stats["peak_traced_mb"] = round(peak / 2**20, 2)
+    return stats
+
+
+def build_template_dir(source_dir, count, dest_dir):
+    """
+    Fill dest_dir with `count` template PNGs, cycling through source_dir when it has fewer.
+    """
+    names = sorted(n for n in os.listdir(source_dir) if n.lower().endswith(".png"))
+    os.makedirs(dest_dir)
+    for i in range(count):
+        name = names[i % len(names)]
+        stem, ext = os.path.splitext(name)
+        shutil.copyfile(os.path.join(source_dir, name), os.path.join(dest_dir, f"{stem}__{i:05d}{ext}"))
+
+
+def install_bank(template_dir):
+    """
+    Point main.py at an uncapped bank over template_dir (no dedup/eviction, so the count is exact).
+
+    Returns (cold load seconds, cached load seconds): decoding every PNG, then
+    a fresh bank mapping the packed cache that the first one wrote. The cached
+    bank is the one installed, as on every start after the first.
+    """
+    cold = TemplateBank(template_dir)
+    start = time.perf_counter()
+    cold.refresh()
+    load_seconds = time.perf_counter() - start
+    cold.save_cache()
+    bank = TemplateBank(template_dir)
+    start = time.perf_counter()
+    bank.refresh()
+    cached_seconds = time.perf_counter() - start
+    fishing_bot.template_bank = bank
+    fishing_bot.template_library = TemplateLibrary(bank, os.path.join(template_dir, "template_stats.json"),
+                                                   os.path.join(template_dir, "evicted"),
+                                                   max_templates=None)
+    return load_seconds, cached_seconds
+
+
+def install_match_pool(workers, sharding):
+    if fishing_bot.match_pool is not None:
+        fishing_bot.match_pool.close()
+    fishing_bot.match_pool = MatchPool(workers, sharding) if workers > 1 else None
+
+
+def bench_find_bobber(frame_rgb, template_source, counts, calls, work_dir, worker_counts=(1,), sharding="interleaved",
+                      modes=("full", "early")):
+    results = []
+    for count in counts:
+        template_dir = os.path.join(work_dir, f"templates_{count}")
+        build_template_dir(template_source, count, template_dir)
+        load_seconds, cached_seconds = install_bank(template_dir)
+        for workers in worker_counts:
+            install_match_pool(workers, sharding)
+            for mode in modes:
+                fishing_bot.EARLY_EXIT_SCORE = MODES[mode]
+                stats = measure(lambda: fishing_bot.find_bobber(frame_rgb), calls)
+                stats.update({"templates": count, "workers": workers, "sharding": sharding, "mode": mode,
+                              "bank_load_ms": round(load_seconds * 1e3, 1),
+                              "bank_cached_load_ms": round(cached_seconds * 1e3, 1)})
+                results.append(stats)
+                print(f"  find_bobber  {count:>5} templates  {workers:>2} workers  {mode:<5}  p50 {stats['p50_ms']:>9.1f} ms  "
+                      f"p90 {stats['p90_ms']:>9.1f} ms  load {stats['bank_load_ms']:>8.1f} ms "
+                      f"(cached {stats['bank_cached_load_ms']:.1f} ms)")
+        shutil.rmtree(template_dir, ignore_errors=True)
+    fishing_bot.EARLY_EXIT_SCORE = MODES["early"]
+    install_match_pool(fishing_bot.MATCH_WORKERS, fishing_bot.MATCH_SHARDING)
+    return results
+
+
+def locate_bobber(frame_rgb, template_source, work_dir):
+    """
+    Where find_bobber locks on the frame with the full template set, or None.
+    """
+    template_dir = os.path.join(work_dir, "templates_locate")
+    build_template_dir(template_source, len([n for n in os.listdir(template_source) if n.lower().endswith(".png")]),
+                       template_dir)
+    install_bank(template_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        found, x, y = fishing_bot.find_bobber(frame_rgb)[:3]
+    shutil.rmtree(template_dir, ignore_errors=True)
+    return (x, y) if found else None
+
+
+def bench_detect_splash(frame_rgb, calls, bobber):
+    # The ROI the bot monitors: centred on the bobber (labeled with --bobber, else where find_bobber locks)
+    x, y = bobber
+    region, roi_x, roi_y = fishing_bot.bobber_roi(x, y)
+    left, top = region["left"] - fishing_bot.SCREENSHOT_REGION["left"], region["top"] - fishing_bot.SCREENSHOT_REGION["top"]
+    roi_bgra = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGRA)[top:top + region["height"], left:left + region["width"]]
+    fishing_bot.initial_intensity = None
+    fishing_bot.splash_detector.reset()
+    stats = measure(lambda: fishing_bot.detect_splash(roi_bgra, roi_x, roi_y), calls)
+    print(f"  detect_splash (ROI {region['width']}x{region['height']})  p50 {stats['p50_ms']:.3f} ms  p99 {stats['p99_ms']:.3f} ms")
+    return stats
+
+
+def bench_find_target_color(frame_rgb, calls):
+    region = AutoFish.SCREENSHOT_REGION
+    frame = cv2.resize(frame_rgb, (region["width"], region["height"]))
+    results = {}
+    for mode in ("first", "centroid", "largest"):
+        stats = measure(lambda: AutoFish.find_target_color(frame, mode=mode), calls)
+        results[mode] = stats
+        print(f"  find_target_color[{mode}]  p50 {stats['p50_ms']:.3f} ms  p99 {stats['p99_ms']:.3f} ms")
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nΔ vs {baseline_path} ({baseline['environment'].get('commit')}):")
+    # Rows from before per-row modes were all measured in the run-wide mode
+    default_mode = "early" if baseline.get("early_exit", True) else "full"
+    old_rows = {(r["templates"], r.get("workers", 1), r.get("mode", default_mode)): r
+                for r in baseline.get("find_bobber", [])}
+    for row in current["find_bobber"]:
+        old = old_rows.get((row["templates"], row.get("workers", 1), row["mode"]))
+        if old:
+            print(f"  find_bobber {row['templates']:>5} x{row.get('workers', 1)} {row['mode']:<5}: "
+                  f"p50 {old['p50_ms']:.1f} → {row['p50_ms']:.1f} ms ({(row['p50_ms'] / old['p50_ms'] - 1) * 100:+.0f}%)")
+    for name in ("detect_splash",):
+        if baseline.get(name) and current.get(name):
+            print(f"  {name}: p50 {baseline[name]['p50_ms']:.3f} → {current[name]['p50_ms']:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bobber/splash detection hot paths")
+    parser.add_argument("--frame", default=os.path.join(project_root, "latest_cast.png"))
+    parser.add_argument("--templates", default=os.path.join(project_root, "bobber_templates"))
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 400, 850, 2000])
+    parser.add_argument("--bobber-calls", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="MATCH_WORKERS values to compare")
+    parser.add_argument("--sharding", default="interleaved", choices=MatchPool.SHARDING)
+    parser.add_argument("--modes", nargs="+", default=["full", "early"], choices=sorted(MODES),
+                        help="find_bobber with every template matched and/or with the bot's early exit")
+    parser.add_argument("--full-scan", action="store_true", help="Same as --modes full")
+    parser.add_argument("--bobber", help="x,y of the bobber in --frame, for the splash ROI (default: where find_bobber locks)")
+    parser.add_argument("--fast-calls", type=int, default=300, help="Calls for detect_splash / find_target_color")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Previous --json output to diff against")
+    parser.add_argument("--log-level", default="INFO", help="Bot log level during the run (output is discarded)")
+    args = parser.parse_args()
+    # Keep the production logging path in the measurement, but discard its output
+    setup_logging(args.log_level, stream=open(os.devnull, "w", encoding="utf-8"))
+
+    frame_bgr = cv2.imread(args.frame, cv2.IMREAD_COLOR)
+    if frame_bgr is None:
+        sys.exit(f"Cannot read frame {args.frame}")
+    frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+
+    modes = ["full"] if args.full_scan else args.modes
+
+    work_dir = tempfile.mkdtemp(prefix="fishing_bench_")
+    fishing_bot.SAVE_DIR = work_dir  # debug images land in the scratch dir
+    try:
+        print("Benchmarking...")
+        if args.bobber:
+            bobber = tuple(int(v) for v in args.bobber.split(","))
+        else:
+            bobber = locate_bobber(frame_rgb, args.templates, work_dir)
+        results = {
+            "environment": environment(),
+            "frame": os.path.basename(args.frame),
+            "bobber": bobber,
+            "find_bobber": bench_find_bobber(frame_rgb, args.templates, args.counts, args.bobber_calls, work_dir,
+                                             args.workers, args.sharding, modes),
+        }
+        if bobber is not None:
+            results["detect_splash"] = bench_detect_splash(frame_rgb, args.fast_calls, bobber)
+        else:
+            print("  detect_splash skipped: no bobber found in the frame (pass --bobber x,y)")
+        results["find_target_color"] = bench_find_target_color(frame_rgb, args.fast_calls)
+    finally:
+        fishing_bot.artifact_writer.flush(timeout=10)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 2**20 if sys.platform == "darwin" else 2**10
+        results["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
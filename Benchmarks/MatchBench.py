@@ -0,0 +1,110 @@
+# MatchBench.py - Per-cast template matching time vs template count
+#
+# Run from the project root:
+#   python -m Benchmarks.MatchBench
+#   python -m Benchmarks.MatchBench --frame latest_cast.png --counts 50 200 850 --repeat 3
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import cv2
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Config.Settings import COLOR_PROFILES, GAME_FLAVOR
+from Core.ColorClassifier import classifier_for
+from Core.TemplateBank import TemplateBank
+from Core.TemplateMatcher import match_templates, count_in_windows
+
+
+def legacy_loop(img_gray, red_mask, templates):
+    """
+    The original find_bobber loop: one TM_SQDIFF_NORMED + minMaxLoc + countNonZero per template.
+    """
+    results = []
+    for template in templates:
+        h, w = template.shape
+        if h > img_gray.shape[0] or w > img_gray.shape[1]:
+            continue
+        result = cv2.matchTemplate(img_gray, template.gray, cv2.TM_SQDIFF_NORMED)
+        min_val, _, min_loc, _ = cv2.minMaxLoc(result)
+        red = cv2.countNonZero(red_mask[min_loc[1]:min_loc[1] + h, min_loc[0]:min_loc[0] + w])
+        results.append((template.name, min_val, min_loc, red))
+    return results
+
+
+def engine(img_gray, red_mask, templates):
+    scores, locs = match_templates(img_gray, templates)
+    counts = count_in_windows(red_mask, locs, [t.shape for t in templates])
+    return [(t.name, float(s), (int(l[0]), int(l[1])), int(c))
+            for t, s, l, c in zip(templates, scores, locs, counts) if np.isfinite(s)]
+
+
+def sample_templates(templates, count):
+    """
+    `count` templates, repeating the bank if it has fewer (scaling beyond the bundled set).
+    """
+    reps = -(-count // len(templates))
+    return (templates * reps)[:count]
+
+
+def time_call(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def red_mask_of(img_rgb):
+    """
+    Feather/tip mask from the active colour profile, the same one find_bobber counts.
+    """
+    return classifier_for(COLOR_PROFILES, GAME_FLAVOR).match(img_rgb, "feather", "tip")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-template matching")
+    parser.add_argument("--frame", default=os.path.join(project_root, "latest_cast.png"))
+    parser.add_argument("--templates", default=os.path.join(project_root, "bobber_templates"))
+    parser.add_argument("--counts", type=int, nargs="+", default=[50, 100, 200, 400, 850])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    bank = TemplateBank(args.templates)
+    bank.refresh()
+    templates = bank.templates()
+    img_rgb = cv2.cvtColor(cv2.imread(args.frame, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+    img_gray = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2GRAY)
+    red_mask = red_mask_of(img_rgb)
+
+    # The engine must be a drop-in: same scores to float32 precision, and the same location
+    # and red count unless two positions tie on score (flat water)
+    for (n1, s1, l1, r1), (n2, s2, l2, r2) in zip(legacy_loop(img_gray, red_mask, templates),
+                                                  engine(img_gray, red_mask, templates)):
+        if n1 != n2 or abs(s1 - s2) > 1e-4 or (l1 == l2 and r1 != r2):
+            print(f"⚠️ Mismatch on {n1}: legacy {s1:.5f} {l1} {r1} vs engine {s2:.5f} {l2} {r2}")
+
+    rows = []
+    print(f"{'templates':>10} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}")
+    for count in args.counts:
+        subset = sample_templates(templates, count)
+        legacy = time_call(lambda: legacy_loop(img_gray, red_mask, subset), args.repeat)
+        batched = time_call(lambda: engine(img_gray, red_mask, subset), args.repeat)
+        rows.append({"templates": count, "legacy_ms": legacy * 1e3, "engine_ms": batched * 1e3})
+        print(f"{count:>10} {legacy * 1e3:>10.1f} {batched * 1e3:>10.1f} {legacy / batched:>7.2f}x")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"frame": args.frame, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# ReplayRun.py - Headless end-to-end run of main.fishing_cycle over a recorded session
+#
+# Frames come from a ReplayFrameSource (directory of PNGs, .npy or .npz stack of
+# full SCREENSHOT_REGION captures) and every key/mouse action is logged by a
+# RecordingInputSink on a virtual clock, so runs are deterministic and need no
+# game, display or Windows input stack. Monitoring uses the inline (same-thread)
+# frame feed unless --pipeline is given, which exercises the capture thread in
+# real time instead. Run from the project root:
+#   python -m Benchmarks.ReplayRun --frames recordings/session1 --events events.jsonl
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import main as fishing_bot
+from Core.FrameSource import ReplayFrameSource
+from Core.InputSink import RecordingInputSink
+from Core.ControlChannel import BotControl
+from Core.EventLog import setup_logging, shutdown_logging
+from Core.Metrics import metrics, setup_metrics
+
+
+def run_replay(frames_path, template_dir, events_path=None, seed=0, origin=None, work_dir=None, pipeline=False):
+    """
+    Run fishing_cycle until the recording is exhausted. Returns a summary dict.
+
+    Templates are copied into a scratch directory first, since a locked bobber
+    auto-saves crops and the library may archive old ones.
+    """
+    random.seed(seed)
+    work_dir = work_dir or tempfile.mkdtemp(prefix="fishing_replay_")
+    scratch_templates = os.path.join(work_dir, "bobber_templates")
+    if not os.path.exists(scratch_templates):
+        shutil.copytree(template_dir, scratch_templates)
+
+    region = fishing_bot.SCREENSHOT_REGION
+    origin = origin or {"left": region["left"], "top": region["top"]}
+    frame_source = ReplayFrameSource.from_path(frames_path, origin)
+    input_sink = RecordingInputSink(events_path)
+
+    fishing_bot.SAVE_DIR = work_dir
+    fishing_bot.frame_source = frame_source
+    fishing_bot.input_sink = input_sink
+    fishing_bot.MONITOR_PIPELINE = pipeline
+    fishing_bot.init_templates(scratch_templates)
+    fishing_bot.control = BotControl()
+
+    metrics.reset()
+    start = time.perf_counter()
+    try:
+        fishing_bot.fishing_cycle()
+    finally:
+        input_sink.close()
+        fishing_bot.artifact_writer.flush(timeout=10)
+        fishing_bot.template_library.save_stats()
+    elapsed = time.perf_counter() - start
+
+    casts = sum(1 for e in input_sink.events if e["action"] == "key_down" and e["key"] == "9")
+    summary = {
+        "frames": frame_source.index,
+        "casts": casts,
+        "bites_clicked": len(input_sink.clicks()),
+        "click_times": [e["t"] for e in input_sink.clicks()],
+        "virtual_seconds": round(input_sink.now(), 3),
+        "wall_seconds": round(elapsed, 3),
+        "frames_per_second": round(frame_source.index / elapsed, 1) if elapsed > 0 else None,
+        "work_dir": work_dir,
+    }
+    if metrics.enabled:
+        summary["metrics"] = metrics.snapshot()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded session through fishing_cycle")
+    parser.add_argument("--frames", required=True, help="PNG directory, .npy or .npz recording")
+    parser.add_argument("--templates", default=os.path.join(project_root, "bobber_templates"))
+    parser.add_argument("--events", help="Write the recorded key/mouse actions here (JSON lines)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--origin", help="Screen left,top of the recorded frames (default: SCREENSHOT_REGION)")
+    parser.add_argument("--work-dir", help="Scratch directory for templates and debug images")
+    parser.add_argument("--pipeline", action="store_true", help="Monitor with the threaded capture pipeline")
+    parser.add_argument("--metrics", action="store_true", help="Collect per-stage timings and include them in the summary")
+    parser.add_argument("--log-level", default="INFO", help="TRACE, DEBUG, INFO or WARNING")
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+    setup_metrics(args.metrics)
+
+    origin = None
+    if args.origin:
+        left, top = (int(v) for v in args.origin.split(","))
+        origin = {"left": left, "top": top}
+    summary = run_replay(args.frames, args.templates, args.events, args.seed, origin, args.work_dir,
+                          args.pipeline)
+    shutdown_logging()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+# TuneThresholds.py - Grid-search main.py's detection thresholds over a labeled corpus
+#
+# The corpus directory holds labels.jsonl, one labeled recording per line:
+#   {"cast": "casts/0001.png", "bobber": [252, 266]}    full SCREENSHOT_REGION capture
+#                                                        (like latest_cast.png); bobber
+#                                                        centre, or null if there is none
+#   {"monitor": "monitor/0001", "bobber": [50, 50], "bite": 14}
+#                                                        ROI frames (PNG directory or .npy
+#                                                        stack), the bobber in them and the
+#                                                        first splash frame (null = no bite)
+# Lock parameters (SQDIFF_ACCEPT, MIN_RED_PIXELS_FOR_MATCH, POSITION_AGREEMENT_PX,
+# MIN_AGREEING_TEMPLATES, EARLY_EXIT_SCORE and the colour profile's SV floor) are scored
+# on the casts, splash parameters on the monitor sequences. Run from the project root:
+#   python -m Benchmarks.TuneThresholds --corpus recordings/labeled
+#   python -m Benchmarks.TuneThresholds --corpus recordings/labeled --grid grid.json --emit tuned.py
+
+import argparse
+import copy
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import cv2
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from Core.ColorClassifier import ColorClassifier
+from Core.SplashDetector import SplashDetector
+from Core.TemplateBank import TemplateBank
+from Core.TemplateMatcher import iter_matches, candidate_blobs, mask_integral, count_in_windows
+
+# Values tried per parameter; --grid replaces any of these lists
+LOCK_GRID = {
+    "SV_FLOOR": [30, 40, 50],
+    "MIN_RED_PIXELS_FOR_MATCH": [30, 50, 80],
+    "SQDIFF_ACCEPT": [0.55, 0.65, 0.75, 0.85],
+    "POSITION_AGREEMENT_PX": [15, 30, 45],
+    "MIN_AGREEING_TEMPLATES": [1, 2, 3],
+    "EARLY_EXIT_SCORE": [0, 0.15, 0.25],
+}
+SPLASH_GRIDS = {
+    "adaptive": {
+        "SPLASH_Z_THRESHOLD": [3.0, 4.0, 5.0, 6.0],
+        "SPLASH_HISTORY": [2, 4, 6],
+        "SPLASH_BASELINE_ALPHA": [0.05, 0.1, 0.2],
+        "ADAPTIVE_CONFIRMATION_FRAMES": [1, 2, 3],
+    },
+    "intensity": {
+        "INTENSITY_CHANGE_THRESHOLD": [2, 3, 4, 6, 8],
+        "CONFIRMATION_FRAMES": [1, 2, 3, 4],
+    },
+}
+
+# Per-process state for the pool workers (set by the initializers)
+_worker = {}
+
+
+def sv_floor_profile(profile, sv):
+    """
+    Copy of a colour profile with its SV floor (the full-hue HSV box) raised or lowered to `sv`.
+    """
+    profile = copy.deepcopy(profile)
+    for rule in profile.values():
+        boxes = rule.get("hsv", [])
+        for i, (lower, upper) in enumerate(boxes):
+            if lower[0] == 0 and upper[0] == 180:
+                boxes[i] = ((0, sv, sv), tuple(upper))
+    return profile
+
+
+def load_corpus(corpus_dir):
+    casts, sequences = [], []
+    with open(os.path.join(corpus_dir, "labels.jsonl"), encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            label = json.loads(line)
+            if "cast" in label:
+                label["path"] = os.path.join(corpus_dir, label["cast"])
+                casts.append(label)
+            elif "monitor" in label:
+                label["path"] = os.path.join(corpus_dir, label["monitor"])
+                sequences.append(label)
+    return casts, sequences
+
+
+def load_frames(path):
+    """
+    ROI frames of a monitor sequence as BGRA arrays (what ScreenCapture returns).
+    """
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith(".png"))
+        frames = [cv2.imread(os.path.join(path, n), cv2.IMREAD_UNCHANGED) for n in names]
+    else:
+        frames = list(np.load(path))
+    return [f if f.shape[2] == 4 else cv2.cvtColor(f, cv2.COLOR_BGR2BGRA) for f in frames if f is not None]
+
+
+# ====================================================
+# STAGE 1: match every template once per cast and variant (cached)
+# ====================================================
+def _init_scorer(template_dir, profile, settings):
+    bank = TemplateBank(template_dir)
+    bank.refresh()
+    _worker["templates"] = sorted(bank.templates(), key=lambda t: t.name)
+    _worker["profile"] = profile
+    _worker["settings"] = settings
+    _worker["classifiers"] = {}
+
+
+def templates_fingerprint(template_dir):
+    bank = TemplateBank(template_dir)
+    bank.refresh()
+    digest = hashlib.sha1()
+    for template in sorted(bank.templates(), key=lambda t: t.name):
+        digest.update(f"{template.name}:{template.mtime}".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def score_cast(task):
+    """
+    Per-template (score, centre, red pixels, seconds) for one cast and one (SV floor, min red, accept) variant.
+
+    Matching uses the bot's reject rule (reject=SQDIFF_ACCEPT): coarse hits
+    at or above the accept threshold are not refined, so a template is only
+    accepted when find_bobber would accept it, and the time recorded is the
+    time the bot would spend on it at that threshold.
+    """
+    path, sv, min_red, accept = task
+    settings = _worker["settings"]
+    classifier = _worker["classifiers"].get(sv)
+    if classifier is None:
+        classifier = _worker["classifiers"][sv] = ColorClassifier(sv_floor_profile(_worker["profile"], sv))
+        classifier.compile()  # build the table outside the timed section
+    img = cv2.cvtColor(cv2.imread(path, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+
+    start = time.perf_counter()
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    red_mask = classifier.match(img, "feather", "tip")
+    blobs = None
+    if settings["prefilter"]:
+        blobs = candidate_blobs(red_mask, min_red, settings["max_blob_pixels"], settings["merge_px"])
+    prepare_seconds = time.perf_counter() - start
+    integral = mask_integral(red_mask)
+
+    templates = _worker["templates"]
+    n = len(templates)
+    scores = np.empty(n, dtype=np.float32)
+    centers = np.empty((n, 2), dtype=np.int32)
+    red = np.empty(n, dtype=np.int32)
+    seconds = np.empty(n, dtype=np.float32)
+    results = iter_matches(gray, templates, blobs, settings["bounds"], settings["scale"], settings["top_k"], accept)
+    for i in range(n):
+        start = time.perf_counter()
+        template, score, loc = next(results)
+        seconds[i] = time.perf_counter() - start
+        h, w = template.shape
+        scores[i] = score
+        centers[i] = (loc[0] + w // 2, loc[1] + h // 2)
+        red[i] = count_in_windows(red_mask, [loc], [template.shape], integral)[0]
+    return task, {"scores": scores, "centers": centers, "red": red,
+                  "cumulative_seconds": prepare_seconds + np.cumsum(seconds)}
+
+
+def score_casts(casts, grid, template_dir, profile, settings, cache_dir, workers):
+    """
+    Stage-1 results keyed by (cast index, SV floor, min red, accept); reused from `cache_dir` when present.
+    """
+    fingerprint = templates_fingerprint(template_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    results, todo, cache_paths = {}, [], {}
+    for index, cast in enumerate(casts):
+        stat = os.stat(cast["path"])
+        for sv, min_red, accept in itertools.product(grid["SV_FLOOR"], grid["MIN_RED_PIXELS_FOR_MATCH"],
+                                                     grid["SQDIFF_ACCEPT"]):
+            key = (f"{cast['path']}|{stat.st_mtime_ns}|{sv}|{min_red}|{accept}|{fingerprint}|"
+                   f"{sorted(settings.items())}|{profile!r}")
+            cache_path = os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + ".npz")
+            cache_paths[(cast["path"], sv, min_red, accept)] = cache_path
+            if os.path.exists(cache_path):
+                with np.load(cache_path) as data:
+                    results[(index, sv, min_red, accept)] = {name: data[name] for name in data.files}
+            else:
+                todo.append((index, (cast["path"], sv, min_red, accept)))
+    print(f"Stage 1: {len(results)} cached, {len(todo)} to match ({workers} workers)")
+    if todo:
+        indices = dict((task, index) for index, task in todo)
+        with ProcessPoolExecutor(workers, initializer=_init_scorer,
+                                 initargs=(template_dir, profile, settings)) as pool:
+            for task, entry in pool.map(score_cast, [task for _, task in todo], chunksize=1):
+                np.savez(cache_paths[task], **entry)
+                results[(indices[task],) + task[1:]] = entry
+    return results
+
+
+# ====================================================
+# STAGE 2: replay find_bobber's decision for each grid point
+# ====================================================
+def lock_decision(entry, params, bounds):
+    """
+    (locked centre or None, seconds spent) for one cast, mirroring find_bobber's filter, early exit and agreement.
+    """
+    scores, centers, red = entry["scores"], entry["centers"], entry["red"]
+    inside = ((centers[:, 0] >= bounds["min_x"]) & (centers[:, 0] <= bounds["max_x"])
+              & (centers[:, 1] >= bounds["min_y"]) & (centers[:, 1] <= bounds["max_y"]))
+    valid = (scores < params["SQDIFF_ACCEPT"]) & (red >= params["MIN_RED_PIXELS_FOR_MATCH"]) & inside
+    agreement = params["POSITION_AGREEMENT_PX"]
+    needed = params["MIN_AGREEING_TEMPLATES"]
+    tried = len(scores)
+    if params["EARLY_EXIT_SCORE"] > 0:
+        strong = []
+        for i in np.flatnonzero(valid & (scores <= params["EARLY_EXIT_SCORE"])):
+            strong.append(centers[i])
+            near = sum(1 for c in strong if abs(c[0] - centers[i][0]) <= agreement and abs(c[1] - centers[i][1]) <= agreement)
+            if near >= needed:
+                tried = i + 1
+                break
+    seconds = float(entry["cumulative_seconds"][tried - 1]) if tried else 0.0
+    candidates = np.flatnonzero(valid[:tried])
+    if not len(candidates):
+        return None, seconds
+    best = candidates[np.lexsort((-red[candidates], scores[candidates]))[0]]
+    bx, by = centers[best]
+    agreeing = np.count_nonzero((np.abs(centers[candidates, 0] - bx) <= agreement)
+                                & (np.abs(centers[candidates, 1] - by) <= agreement))
+    return ((int(bx), int(by)) if agreeing >= needed else None), seconds
+
+
+def _init_lock_evaluator(casts, scored, bounds, tolerance):
+    _worker.update(casts=casts, scored=scored, bounds=bounds, tolerance=tolerance)
+
+
+def evaluate_lock(params):
+    tp = fp = fn = 0
+    latencies = []
+    for index, cast in enumerate(_worker["casts"]):
+        entry = _worker["scored"][(index, params["SV_FLOOR"], params["MIN_RED_PIXELS_FOR_MATCH"],
+                                   params["SQDIFF_ACCEPT"])]
+        locked, seconds = lock_decision(entry, params, _worker["bounds"])
+        latencies.append(seconds)
+        truth = cast.get("bobber")
+        correct = (locked is not None and truth is not None
+                   and max(abs(locked[0] - truth[0]), abs(locked[1] - truth[1])) <= _worker["tolerance"])
+        if correct:
+            tp += 1
+        else:
+            fp += locked is not None
+            fn += truth is not None
+    return summarize(params, tp, fp, fn, latencies)
+
+
+def _init_splash_evaluator(sequences, detector, interval, bite_window, crop_size, profile):
+    # `profile` is the colour profile for the whitewater signal (None when main.SPLASH_WHITEWATER is off)
+    crops = []
+    for sequence in sequences:
+        x, y = sequence["bobber"]
+        half = crop_size // 2
+        crops.append([np.ascontiguousarray(f[max(0, y - half):y + half, max(0, x - half):x + half])
+                      for f in load_frames(sequence["path"])])
+    _worker.update(sequences=sequences, crops=crops, detector=detector, interval=interval, bite_window=bite_window,
+                   classifier=ColorClassifier(profile) if profile is not None else None)
+
+
+def first_bite(crops, params, detector):
+    """
+    Index of the frame on which the bite would be confirmed (None if never), as main.detect_splash counts it.
+    """
+    if detector == "adaptive":
+        splash_detector = SplashDetector(history=params["SPLASH_HISTORY"], alpha=params["SPLASH_BASELINE_ALPHA"],
+                                         z_threshold=params["SPLASH_Z_THRESHOLD"], classifier=_worker["classifier"])
+        verdicts = (splash_detector.update(crop) for crop in crops)
+        confirmation = params["ADAPTIVE_CONFIRMATION_FRAMES"]
+    else:
+        means = [np.mean(cv2.cvtColor(crop, cv2.COLOR_BGRA2GRAY)) for crop in crops]
+        verdicts = [False] + [abs(m - means[0]) > params["INTENSITY_CHANGE_THRESHOLD"] for m in means[1:]]
+        confirmation = params["CONFIRMATION_FRAMES"]
+    count = 0
+    for i, splash in enumerate(verdicts):
+        count = count + 1 if splash else 0
+        if count >= confirmation:
+            return i
+    return None
+
+
+def evaluate_splash(params):
+    tp = fp = fn = 0
+    latencies = []
+    for sequence, crops in zip(_worker["sequences"], _worker["crops"]):
+        detected = first_bite(crops, params, _worker["detector"])
+        bite = sequence.get("bite")
+        if bite is not None and detected is not None and bite <= detected <= bite + _worker["bite_window"]:
+            tp += 1
+            latencies.append((detected - bite) * _worker["interval"])
+        else:
+            fp += detected is not None and (bite is None or detected < bite)
+            fn += bite is not None
+    return summarize(params, tp, fp, fn, latencies)
+
+
+def summarize(params, tp, fp, fn, latencies):
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"params": params, "tp": tp, "fp": fp, "fn": fn,
+            "precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4),
+            "mean_ms": round(float(np.mean(latencies)) * 1e3, 2) if latencies else 0.0,
+            "p90_ms": round(float(np.percentile(latencies, 90)) * 1e3, 2) if latencies else 0.0}
+
+
+def grid_points(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def rank(results, min_precision, current):
+    """
+    Best first: precision floor met, then recall, then precision, then latency (to the ms).
+    Remaining ties go to the point that changes the fewest of the `current` values.
+    """
+    def key(r):
+        changed = sum(1 for name, value in r["params"].items() if current.get(name) != value)
+        return r["precision"] < min_precision, -r["recall"], -r["precision"], round(r["mean_ms"]), changed
+    return sorted(results, key=key)
+
+
+def print_table(title, ranked, baseline, top):
+    print(f"\n{title}")
+    print(f"  {'precision':>9} {'recall':>7} {'f1':>6} {'mean ms':>8} {'p90 ms':>8}  params")
+    rows = [("current", baseline)] + [(f"#{i + 1}", r) for i, r in enumerate(ranked[:top])]
+    for label, r in rows:
+        if r is None:
+            continue
+        params = " ".join(f"{k}={v}" for k, v in r["params"].items())
+        print(f"  {r['precision']:>9.3f} {r['recall']:>7.3f} {r['f1']:>6.3f} {r['mean_ms']:>8.2f} {r['p90_ms']:>8.2f}  "
+              f"{label:<8} {params}")
+
+
+def emit_config(path, corpus_dir, lock_best, splash_best, profile_name, profile):
+    """
+    Write the winning values as Python assignments to paste into main.py (and the profile into Config/Settings.py).
+    """
+    lines = [f"# Tuned by Benchmarks/TuneThresholds.py on {corpus_dir} ({time.strftime('%Y-%m-%d %H:%M')})"]
+    for section, best in (("Lock", lock_best), ("Splash", splash_best)):
+        if best is None:
+            continue
+        lines.append(f"# {section}: precision {best['precision']:.3f}, recall {best['recall']:.3f}, "
+                     f"mean {best['mean_ms']:.2f} ms ({best['tp']} TP / {best['fp']} FP / {best['fn']} FN)")
+        for name, value in best["params"].items():
+            if name != "SV_FLOOR":
+                lines.append(f"{name} = {value!r}")
+    if lock_best is not None:
+        tuned = sv_floor_profile(profile, lock_best["params"]["SV_FLOOR"])
+        lines.append(f"# Config/Settings.py (only the {profile_name!r} flavour was tuned)")
+        lines.append(f"COLOR_PROFILES[{profile_name!r}] = {tuned!r}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"\nBest profile written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune detection thresholds on a labeled corpus")
+    parser.add_argument("--corpus", required=True, help="Directory with labels.jsonl")
+    parser.add_argument("--templates", default=os.path.join(project_root, "bobber_templates"))
+    parser.add_argument("--grid", help="JSON file of {PARAMETER: [values]} overriding the default grids")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache-dir", help="Stage-1 match cache (default: CORPUS/.tune_cache)")
+    parser.add_argument("--tolerance", type=int, default=15, help="Max px between lock and labeled bobber")
+    parser.add_argument("--bite-window", type=int, default=5, help="Frames after the labeled bite a click still counts")
+    parser.add_argument("--splash-detector", choices=sorted(SPLASH_GRIDS), help="Default: main.SPLASH_DETECTOR")
+    parser.add_argument("--flavor", help="Colour profile to tune and emit (default: GAME_FLAVOR in Config/Settings.py)")
+    parser.add_argument("--min-precision", type=float, default=0.98, help="Rank points below this precision last")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="Write every evaluated point here")
+    parser.add_argument("--emit", help="Write the best values as Python config here")
+    args = parser.parse_args()
+
+    import main as fishing_bot  # the bot's current values are the baseline and the fixed settings
+    from Config.Settings import COLOR_PROFILES, GAME_FLAVOR
+
+    detector = args.splash_detector or fishing_bot.SPLASH_DETECTOR
+    lock_grid = dict(LOCK_GRID)
+    splash_grid = dict(SPLASH_GRIDS[detector])
+    if args.grid:
+        with open(args.grid, encoding="utf-8") as f:
+            for name, values in json.load(f).items():
+                (lock_grid if name in lock_grid else splash_grid)[name] = values
+    flavor = args.flavor or GAME_FLAVOR  # the corpus should come from this client
+    if flavor not in COLOR_PROFILES:
+        sys.exit(f"No colour profile for {flavor!r}; known: {', '.join(COLOR_PROFILES)}")
+    profile = COLOR_PROFILES[flavor]
+    current_sv = next((lower[1] for rule in profile.values() for lower, upper in rule.get("hsv", [])
+                       if lower[0] == 0 and upper[0] == 180), None)
+    current = {name: getattr(fishing_bot, name) for name in list(LOCK_GRID) + list(splash_grid) if hasattr(fishing_bot, name)}
+    current["SV_FLOOR"] = current_sv
+    # The baseline is evaluated too, so its values must be in the grid
+    for grid in (lock_grid, splash_grid):
+        for name in grid:
+            if current.get(name) is not None and current[name] not in grid[name]:
+                grid[name] = sorted(grid[name] + [current[name]])
+
+    casts, sequences = load_corpus(args.corpus)
+    print(f"Corpus: {len(casts)} casts, {len(sequences)} monitor sequences")
+    report = {"corpus": args.corpus, "detector": detector, "flavor": flavor}
+    lock_best = splash_best = None
+    start = time.perf_counter()
+
+    if casts:
+        settings = {"bounds": fishing_bot.BOBBER_AREA_BOUNDS, "prefilter": fishing_bot.CANDIDATE_PREFILTER,
+                    "max_blob_pixels": fishing_bot.CANDIDATE_MAX_BLOB_PIXELS, "merge_px": fishing_bot.CANDIDATE_MERGE_PX,
+                    "scale": fishing_bot.PYRAMID_SCALE, "top_k": fishing_bot.PYRAMID_TOP_K}
+        scored = score_casts(casts, lock_grid, args.templates, profile, settings,
+                             args.cache_dir or os.path.join(args.corpus, ".tune_cache"), args.workers)
+        points = grid_points(lock_grid)
+        print(f"Stage 2: {len(points)} lock parameter sets")
+        with ProcessPoolExecutor(args.workers, initializer=_init_lock_evaluator,
+                                 initargs=(casts, scored, fishing_bot.BOBBER_AREA_BOUNDS, args.tolerance)) as pool:
+            results = list(pool.map(evaluate_lock, points, chunksize=max(1, len(points) // (args.workers * 4))))
+        ranked = rank(results, args.min_precision, current)
+        baseline = next((r for r in results if all(r["params"][k] == current[k] for k in lock_grid)), None)
+        print_table("Lock (find_bobber; latency = estimated matching time per cast)", ranked, baseline, args.top)
+        lock_best = ranked[0]
+        report["lock"] = {"baseline": baseline, "results": ranked}
+
+    if sequences:
+        points = grid_points(splash_grid)
+        print(f"\nSplash: {len(points)} {detector} parameter sets")
+        with ProcessPoolExecutor(args.workers, initializer=_init_splash_evaluator,
+                                 initargs=(sequences, detector, fishing_bot.INTERVAL, args.bite_window,
+                                           fishing_bot.BOBBER_CROP_SIZE,
+                                           profile if fishing_bot.SPLASH_WHITEWATER else None)) as pool:
+            results = list(pool.map(evaluate_splash, points, chunksize=max(1, len(points) // (args.workers * 4))))
+        ranked = rank(results, args.min_precision, current)
+        baseline = next((r for r in results if all(r["params"][k] == current[k] for k in splash_grid)), None)
+        print_table("Splash (latency = labeled bite to confirmed bite)", ranked, baseline, args.top)
+        splash_best = ranked[0]
+        report["splash"] = {"baseline": baseline, "results": ranked}
+
+    print(f"\nDone in {time.perf_counter() - start:.1f}s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.emit:
+        emit_config(args.emit, args.corpus, lock_best, splash_best, flavor, profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 # Settings.py
 
+import copy
 
 
 # ====================================================
@@ -16,6 +17,25 @@ SCREENSHOT_REGION = {"left": 700, "top": 75, "width": 450, "height": 500}
 # Splash color detection
 TARGET_COLOR = (255, 255, 245)  # Adjust per game version
 COLOR_TOLERANCE = 10
+TARGET_MODE = "first"    # "first" = first matching pixel, "centroid" = all matches, "largest" = biggest splash blob
+
+# Colour profiles per game flavour, compiled into one lookup table by Core/ColorClassifier.py.
+# Each label lists (lower, upper) boxes a pixel must fall inside, in "hsv" (OpenCV: H 0-180) and/or "rgb".
+GAME_FLAVOR = "classic"  # "retail", "cata" or "classic"
+_SV_FLOOR = ((0, 40, 40), (180, 255, 255))  # Deep blue water has a high V but low S compared to the bobber
+_SPLASH_WHITE = (tuple(max(c - COLOR_TOLERANCE, 0) for c in TARGET_COLOR),
+                 tuple(min(c + COLOR_TOLERANCE, 255) for c in TARGET_COLOR))
+COLOR_PROFILES = {
+    "classic": {
+        "feather": {"hsv": [((120, 40, 40), (170, 255, 255)), _SV_FLOOR]},  # Purple feather, dull in shadow
+        "tip": {"hsv": [((0, 50, 50), (20, 255, 255)), _SV_FLOOR]},         # Orange/red tip, muted by water
+        "splash": {"rgb": [_SPLASH_WHITE]},
+    },
+}
+# Retail and Cata start from their own copy of the Classic ranges; override labels here when a
+# client's art differs (or paste a profile tuned by Benchmarks/TuneThresholds.py)
+COLOR_PROFILES["cata"] = copy.deepcopy(COLOR_PROFILES["classic"])
+COLOR_PROFILES["retail"] = copy.deepcopy(COLOR_PROFILES["classic"])
 
 # Timing settings
 INTERVAL = 1 / 30       # ~30 FPS
@@ -24,5 +44,8 @@ POST_ACTION_DELAY = 2   # Delay before next cycle
 LURE_WAIT_TIME = 5      # Time to wait after applying lure
 START_DELAY = 5         # 5-second delay before applying lure
 
+# Logging ("TRACE", "DEBUG", "INFO", "WARNING"); the FISHING_LOG_LEVEL env var overrides
+LOG_LEVEL = "INFO"
+
 # Global control flag for stopping
 running = True
@@ -0,0 +1,112 @@
+# ArtifactWriter.py - Background, rate-limited writer for debug images
+
+import atexit
+import collections
+import os
+import threading
+import numpy as np
+import cv2
+from Core.EventLog import get_logger
+
+log = get_logger("artifacts")
+
+
+class ArtifactWriter:
+    """
+    Writes debug artifacts on a background thread so the bot never waits on PNG encoding.
+
+    submit() queues a (path, image) pair, where `image` is a BGR array or a
+    zero-argument callable returning one, so even rendering (colour conversion,
+    drawing overlays) happens off the hot path. The queue is bounded: when it
+    is full the oldest pending artifact is dropped. sample() decides whether a
+    cast's artifacts are worth writing at all (every Nth cast, or failures only).
+    """
+
+    def __init__(self, max_queue=8, every_nth=1, failures_only=False, fmt="png", png_compression=1):
+        self.max_queue = max_queue
+        self.every_nth = max(1, every_nth)
+        self.failures_only = failures_only
+        self.fmt = fmt
+        self.png_compression = png_compression
+        self.written = 0
+        self.dropped = 0
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="ArtifactWriter", daemon=True)
+        self._thread.start()
+        # Daemon threads die mid-imwrite at interpreter exit otherwise (OpenCV aborts the process)
+        atexit.register(self.close)
+
+    def sample(self, cast_index, failed):
+        """
+        Should artifacts for this cast be written?
+        """
+        if self.failures_only and not failed:
+            return False
+        return cast_index % self.every_nth == 0
+
+    def submit(self, path, image, label=None):
+        """
+        Queue `image` (array or callable) for writing to `path`. Never blocks.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append((path, image, label))
+            self._cond.notify()
+
+    def flush(self, timeout=None):
+        """
+        Wait until everything queued so far has been written. Returns False on timeout.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self.dropped:
+            log.warning("artifact", f"⚠️ {self.dropped} debug artifacts were dropped (writer fell behind)",
+                        written=self.written)
+
+    def _write(self, path, image):
+        if self.fmt == "npy":
+            path = os.path.splitext(path)[0] + ".npy"
+            np.save(path, image)
+            return path
+        if cv2.imwrite(path, image, [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]):
+            return path
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                path, image, label = self._queue.popleft()
+                self._busy = True
+            try:
+                if callable(image):
+                    image = image()
+                written = self._write(path, image)
+                if written:
+                    self.written += 1
+                    if label:
+                        log.debug("artifact", f"📸 {label}: {written}")
+            except Exception as e:
+                log.warning("artifact", f"⚠️ Artifact write failed for {path}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
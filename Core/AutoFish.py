@@ -129,12 +129,7 @@
 import time
 import threading
 import numpy as np
-import pyautogui
 import cv2
-from PIL import Image
-import mss
-import keyboard  # Using keyboard to listen for spacebar globally
-import os
 import sys
 
 sys.stdout.reconfigure(encoding='utf-8')
@@ -145,42 +140,148 @@ project_root = r'C:\Users\mikel\Documents\4klabs\FishingTrainer'
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from Config.Settings import DEBUG, SCREENSHOT_REGION, TARGET_COLOR, COLOR_TOLERANCE, INTERVAL, TIMEOUT, POST_ACTION_DELAY, LURE_WAIT_TIME, START_DELAY
-from Config.PreviewSS import preview_screenshot
+from Config.Settings import DEBUG, SCREENSHOT_REGION, TARGET_COLOR, COLOR_TOLERANCE, TARGET_MODE, INTERVAL, TIMEOUT, POST_ACTION_DELAY, LURE_WAIT_TIME, START_DELAY, LOG_LEVEL, COLOR_PROFILES, GAME_FLAVOR
+from Core.FrameSource import LiveFrameSource
+from Core.InputSink import LiveInputSink
+from Core.EventLog import get_logger, setup_logging, shutdown_logging
+from Core.ControlChannel import BotControl, ControlChannel, CONTROL_FLAG
+from Core.ColorClassifier import classifier_for
+from Core.ChangeGate import ChangeGate
+from Core.Metrics import metrics
 
 # Global control flag for stopping
 running = True
 
-# Define a file to act as a pause flag
-PAUSE_FILE = os.path.join(project_root, 'pause_flag.txt')
+log = get_logger("autofish")
+
+# Pause/stop state, driven by the UI over the control channel (see Core/ControlChannel.py)
+control = BotControl()
+started_at = time.time()
+clicks = 0
+
+# Splash colour for the selected game flavour (see COLOR_PROFILES in Config/Settings.py)
+classifier = classifier_for(COLOR_PROFILES, GAME_FLAVOR)
+
+# Frames that look like the last searched one are not searched again (no new splash can be in them)
+change_gate = ChangeGate()
 
 def wait_for_keypress():
     """
     Wait for the user to press the spacebar globally using `keyboard`.
+    Returns False if the bot was stopped (e.g. from the UI) before it got going.
     """
-    print("🎣 Fishing Bot Initialized. Press SPACE to start.")
-    keyboard.wait('space')
-    print("✅ Spacebar pressed!")
+    import keyboard  # Using keyboard to listen for spacebar globally (live-only)
+    log.info("session", "🎣 Fishing Bot Initialized. Press SPACE to start.")
+    pressed = threading.Event()
+    hotkey = keyboard.add_hotkey('space', pressed.set)
+    try:
+        # keyboard.wait() can't be interrupted, so wait on the stop event in short slices
+        while not pressed.is_set():
+            if control.wait_stopped(0.1):
+                return False
+    finally:
+        keyboard.remove_hotkey(hotkey)
+    log.info("control", "✅ Spacebar pressed!")
     
     # Countdown before starting the lure
     for i in range(START_DELAY, 0, -1):
-        print(f"⏳ Starting in {i} seconds...")
-        time.sleep(1)
+        log.info("session", f"⏳ Starting in {i} seconds...")
+        if control.wait_stopped(1):
+            return False
+    return True
 
-def find_target_color(img, target_color, tolerance):
+def find_target_color(img, target_color=None, tolerance=None, mode="first", label="splash"):
     """
-    Search for the target color in a NumPy image array.
+    Search for the splash color in an RGB image (PIL image or NumPy array).
+
+    Pixels carrying `label` in the active colour profile (TARGET_COLOR within
+    COLOR_TOLERANCE on every channel, by default) are masked in one pass by
+    the shared ColorClassifier. Passing `target_color` and/or `tolerance`
+    matches that colour box instead (the other falls back to the setting).
+    `mode` picks the reported point:
+        "first"    - first matching pixel in raster order (top-left scan)
+        "centroid" - centroid of all matching pixels
+        "largest"  - centroid of the largest connected blob (the splash center)
+    Returns (found, x, y).
     """
-    img_np = np.array(img)
-    height, width = img_np.shape[:2]
-
-    for y in range(height):
-        for x in range(width):
-            pixel = img_np[y, x]
-            if all(abs(int(pixel[i]) - target_color[i]) <= tolerance for i in range(3)):
-                return True, x, y
-
-    return False, None, None
+    img_np = np.ascontiguousarray(np.asarray(img)[:, :, :3])
+    if target_color is None and tolerance is None:
+        mask = classifier.match(img_np, label)
+    else:
+        color = np.array(TARGET_COLOR if target_color is None else target_color, dtype=np.int16)
+        tolerance = COLOR_TOLERANCE if tolerance is None else tolerance
+        mask = cv2.inRange(img_np, np.clip(color - tolerance, 0, 255).astype(np.uint8),
+                           np.clip(color + tolerance, 0, 255).astype(np.uint8))
+
+    if mode == "first":
+        flat = mask.ravel()
+        idx = int(np.argmax(flat))
+        if not flat[idx]:
+            return False, None, None
+        y, x = divmod(idx, mask.shape[1])
+        return True, x, y
+
+    if mode == "centroid":
+        moments = cv2.moments(mask, binaryImage=True)
+        if moments["m00"] == 0:
+            return False, None, None
+        return True, int(moments["m10"] / moments["m00"]), int(moments["m01"] / moments["m00"])
+
+    if mode == "largest":
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        if count <= 1:
+            return False, None, None
+        label = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        return True, int(centroids[label][0]), int(centroids[label][1])
+
+    raise ValueError(f"Unknown target mode: {mode}")
+
+def reload_settings():
+    """
+    Re-read Config/Settings.py so tuning changes apply without restarting the bot.
+    """
+    global DEBUG, SCREENSHOT_REGION, TARGET_COLOR, COLOR_TOLERANCE, TARGET_MODE, INTERVAL, TIMEOUT, POST_ACTION_DELAY, LURE_WAIT_TIME, classifier
+    import importlib
+    from Config import Settings
+    importlib.reload(Settings)
+    DEBUG, SCREENSHOT_REGION = Settings.DEBUG, Settings.SCREENSHOT_REGION
+    TARGET_COLOR, COLOR_TOLERANCE, TARGET_MODE = Settings.TARGET_COLOR, Settings.COLOR_TOLERANCE, Settings.TARGET_MODE
+    classifier = classifier_for(Settings.COLOR_PROFILES, Settings.GAME_FLAVOR)
+    INTERVAL, TIMEOUT = Settings.INTERVAL, Settings.TIMEOUT
+    POST_ACTION_DELAY, LURE_WAIT_TIME = Settings.POST_ACTION_DELAY, Settings.LURE_WAIT_TIME
+    log.info("control", "🔄 Settings reloaded")
+
+def run_requests(input_sink):
+    """
+    Carry out one-shot actions the controller asked for, on the fishing thread.
+    """
+    for action in control.take_requests():
+        if action == "lure":
+            log.info("lure", "🎣 Re-applying lure.")
+            input_sink.press('2')
+            input_sink.wait(LURE_WAIT_TIME)
+            input_sink.press('1')  # applying the lure cancels the cast
+        elif action == "reload":
+            reload_settings()
+
+def stop_bot():
+    global running
+    running = False
+    control.stop()
+
+def report_status():
+    log.info("control", "📋 Status", running=running and not control.stopped, paused=control.paused,
+             clicks=clicks, uptime_s=int(time.time() - started_at), **change_gate.stats())
+
+def control_handlers():
+    return {
+        "pause": control.pause,
+        "resume": control.resume,
+        "stop": stop_bot,
+        "lure": lambda: control.request("lure"),
+        "reload": lambda: control.request("reload"),
+        "status": report_status,
+    }
 
 def show_debug_image(img):
     """
@@ -191,75 +292,92 @@ def show_debug_image(img):
     cv2.waitKey(1000)
     cv2.destroyWindow("Screenshot")
 
-def start_fishing():
+def start_fishing(frame_source=None, input_sink=None):
     """
     Main function to detect splash and auto-click.
+    Frames and actions go through the given backends (live screen/mouse by default),
+    so a ReplayFrameSource + RecordingInputSink can run the loop headless.
     """
-    global running
+    global running, clicks
     paused = False  # Flag to track if we've already printed pause/resume messages
-    print("🎣 Fishing bot started!")
+    log.info("session", "🎣 Fishing bot started!")
 
-    with mss.mss() as sct:
-        while running:
-            # Check for pause flag at the very start of each iteration.
-            if os.path.exists(PAUSE_FILE):
+    frame_source = frame_source or LiveFrameSource()
+    input_sink = input_sink or LiveInputSink()
+    try:
+        while running and not control.stopped:
+            # Check for pause at the very start of each iteration.
+            if control.paused:
                 if not paused:
-                    print("⏸️ Fishing paused. Waiting for resume...")
+                    log.info("control", "⏸️ Fishing paused. Waiting for resume...")
                     paused = True
-                time.sleep(0.5)
+                control.wait_resumed(0.5)
                 continue  # Skip the rest of the loop until unpaused
             else:
                 if paused:
-                    print("▶️ Resuming fishing...")
+                    log.info("control", "▶️ Resuming fishing...")
                     paused = False
+            run_requests(input_sink)
 
-            start_time = time.time()
+            start_time = input_sink.now()
             detection_made = False
+            change_gate.reset()  # the first frame of every cast is searched
 
             # Begin splash detection loop (only runs if not paused)
-            while time.time() - start_time < TIMEOUT:
-                if not running:
+            while input_sink.now() - start_time < TIMEOUT:
+                if not running or control.stopped:
                     return
 
                 # Double-check pause status inside the inner loop
-                if os.path.exists(PAUSE_FILE):
+                if control.paused:
                     if not paused:
-                        print("⏸️ Fishing paused during detection. Waiting for resume...")
+                        log.info("control", "⏸️ Fishing paused during detection. Waiting for resume...")
                         paused = True
-                    time.sleep(0.5)
                     # Break out of the inner loop if paused
                     break
+                if control.has_requests:
+                    break  # handled at the top of the loop
 
                 # Capture the region
-                sct_img = sct.grab(SCREENSHOT_REGION)
-                img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
+                img = frame_source.grab_rgb(SCREENSHOT_REGION)
+                if img is None:
+                    log.info("session", "📼 Frame source exhausted")
+                    return
 
                 if DEBUG:
                     show_debug_image(img)
 
-                found, rel_x, rel_y = find_target_color(img, TARGET_COLOR, COLOR_TOLERANCE)
+                if not change_gate.changed(img):
+                    metrics.inc("frames_skipped")
+                    input_sink.wait(INTERVAL)
+                    continue
+                metrics.inc("frames_analyzed")
+                found, rel_x, rel_y = find_target_color(img, mode=TARGET_MODE)
                 if found:
                     abs_x = SCREENSHOT_REGION["left"] + rel_x
                     abs_y = SCREENSHOT_REGION["top"] + rel_y
 
-                    print(f"🎯 Splash detected at ({abs_x}, {abs_y}). Clicking!")
-                    pyautogui.moveTo(abs_x, abs_y, duration=0.1)
-                    pyautogui.rightClick()
+                    log.info("bite", f"🎯 Splash detected at ({abs_x}, {abs_y}). Clicking!")
+                    input_sink.move_to(abs_x, abs_y, duration=0.1)
+                    input_sink.right_click()
+                    clicks += 1
 
                     # Wait 2 seconds before casting the fishing line
-                    time.sleep(2)
-                    pyautogui.press('1')
+                    input_sink.wait(2)
+                    input_sink.press('1')
                     detection_made = True
                     break
 
-                time.sleep(INTERVAL)
+                input_sink.wait(INTERVAL)
 
             # Only cast again if detection wasn't made and we're not paused.
-            if not detection_made and not os.path.exists(PAUSE_FILE):
-                pyautogui.press('1')
-                print(f"⏳ Timeout reached ({TIMEOUT}s), casting again.")
+            if not detection_made and not control.paused and not control.stopped and not control.has_requests:
+                input_sink.press('1')
+                log.info("timeout", f"⏳ Timeout reached ({TIMEOUT}s), casting again.")
 
-            time.sleep(POST_ACTION_DELAY)
+            input_sink.wait(POST_ACTION_DELAY)
+    finally:
+        frame_source.close()
 
 
 def main():
@@ -267,28 +385,38 @@ def main():
     Wait for user input via a global spacebar press, then start lure application and the fishing loop.
     """
     global running
+    setup_logging(LOG_LEVEL)
+    if CONTROL_FLAG in sys.argv:
+        # Started by the UI: commands arrive on stdin; if the UI goes away, stop
+        ControlChannel(sys.stdin, control_handlers(), on_close=stop_bot).start()
+    from Config.PreviewSS import preview_screenshot  # live-only: needs mss and a display
 
     # Show the screenshot preview window before starting (auto-closes after 10 seconds)
     preview_screenshot(SCREENSHOT_REGION, duration=10)
 
     # Wait for a global spacebar press to start the bot
-    wait_for_keypress()
-
-    print("🎣 Pressing '2' to start lure macro.")
-    pyautogui.press('2')  # Start lure macro
-    print("🕒 Waiting for lure to apply...")
-    time.sleep(LURE_WAIT_TIME)  # Ensure lure is applied
-
-    print("✅ Lure applied! Starting fishing script...")
-    fishing_thread = threading.Thread(target=start_fishing, daemon=True)
+    if not wait_for_keypress():
+        log.info("session", "👋 Stopped before start. Exiting Fishing Bot...")
+        shutdown_logging()
+        return
+
+    input_sink = LiveInputSink()
+    log.info("lure", "🎣 Pressing '2' to start lure macro.")
+    input_sink.press('2')  # Start lure macro
+    log.info("lure", "🕒 Waiting for lure to apply...")
+    control.wait_stopped(LURE_WAIT_TIME)  # Ensure lure is applied (a stop ends the wait; start_fishing then exits)
+
+    log.info("lure", "✅ Lure applied! Starting fishing script...")
+    fishing_thread = threading.Thread(target=start_fishing, args=(LiveFrameSource(), input_sink), daemon=True)
     fishing_thread.start()
 
     try:
-        while True:
-            time.sleep(1)  # Keep the main thread alive
+        while fishing_thread.is_alive():
+            fishing_thread.join(1)  # Keep the main thread alive until stopped
     except KeyboardInterrupt:
-        running = False
-        print("\n👋 Exiting Fishing Bot...")
+        stop_bot()
+    log.info("session", "👋 Exiting Fishing Bot...")
+    shutdown_logging()
 
 if __name__ == "__main__":
     main()
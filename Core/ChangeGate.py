@@ -0,0 +1,56 @@
+# ChangeGate.py - Skips detection on frames that look like the last analysed one
+
+import numpy as np
+import cv2
+
+
+class ChangeGate:
+    """
+    Cheap test for whether a frame changed enough to be worth analysing.
+
+    Every `step`-th pixel of every `step`-th row is sampled, and the samples
+    are averaged over `block` x `block` cells, one cell per
+    (step * block) px square. Averaging cancels per-pixel noise and water
+    shimmer, while a bobber moving a pixel or a splash still shifts whole
+    cells. A frame counts as changed when any cell differs from the last
+    *analysed* frame by at least `threshold` levels on any channel. Since the
+    comparison is against the last analysed frame rather than the previous
+    one, slow drift still adds up until it gets through.
+
+    `processed` and `skipped` count the verdicts since the last reset().
+    """
+
+    def __init__(self, step=4, block=4, threshold=6.0):
+        self.step = step
+        self.block = block
+        self.threshold = threshold
+        self.reference = None
+        self.processed = 0
+        self.skipped = 0
+
+    def reset(self):
+        self.reference = None
+        self.processed = 0
+        self.skipped = 0
+
+    def signature(self, frame):
+        samples = np.asarray(frame)[::self.step, ::self.step]
+        h, w = samples.shape[:2]
+        return cv2.resize(samples, (max(1, w // self.block), max(1, h // self.block)), interpolation=cv2.INTER_AREA)
+
+    def changed(self, frame, force=False):
+        """
+        True if `frame` should be analysed (it then becomes the new reference).
+        `force` lets it through regardless, e.g. while a detector warms up.
+        """
+        signature = self.signature(frame)
+        if (force or self.reference is None or signature.shape != self.reference.shape
+                or cv2.norm(signature, self.reference, cv2.NORM_INF) >= self.threshold):
+            self.reference = signature
+            self.processed += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        return {"analyzed": self.processed, "skipped": self.skipped}
@@ -0,0 +1,143 @@
+# ColorClassifier.py - Per-pixel colour labels from one precompiled lookup table
+
+import numpy as np
+import cv2
+
+# The table is indexed by the 24-bit colour R << 16 | G << 8 | B, which is also what
+# a little-endian BGRA pixel reads as once the alpha byte is masked off.
+_KEY_MASK = 0xFFFFFF
+
+
+def _color_cube():
+    """
+    Every 24-bit colour once, as a 4096x4096 RGB image laid out in key order.
+    """
+    ramp = np.arange(256, dtype=np.uint8)
+    cube = np.empty((256, 256, 256, 3), dtype=np.uint8)
+    cube[..., 0] = ramp[:, None, None]
+    cube[..., 1] = ramp[None, :, None]
+    cube[..., 2] = ramp[None, None, :]
+    return cube.reshape(4096, 4096, 3)
+
+
+class ColorClassifier:
+    """
+    Labels every pixel of a frame (feather, tip, splash, ...) with one table lookup.
+
+    A profile maps label names to rules. A rule lists (lower, upper) boxes in
+    "hsv" (OpenCV ranges, H 0-180) and/or "rgb"; a pixel gets the label when
+    it falls inside all of them, exactly as chained cv2.inRange/bitwise_and
+    calls would decide. Profiles live in Config/Settings.py (COLOR_PROFILES).
+
+    The rules are evaluated once for all 16.7M colours by compile() (~0.2 s,
+    a 16 MB table, ~100 MB while building), or on the first classify() if
+    compile() was never called. After that,
+    classify() turns a frame into a label image (one bit per label) without
+    any per-frame HSV conversion, and mask() selects any combination of labels
+    from it as a 0/255 mask. A label that is a single RGB box (the splash
+    white) is matched with one cv2.inRange by match(), which is cheaper than
+    the lookup for that case, so code that only matches such labels never
+    builds the table.
+    """
+
+    def __init__(self, profile):
+        if len(profile) > 8:
+            raise ValueError("A colour profile can have at most 8 labels")
+        for name, rule in profile.items():
+            unknown = set(rule) - {"hsv", "rgb"}
+            if unknown:
+                raise ValueError(f"Colour label {name}: unknown rule {sorted(unknown)}")
+            if not rule.get("hsv") and not rule.get("rgb"):
+                raise ValueError(f"Colour label {name}: no ranges")
+        self.labels = {name: 1 << i for i, name in enumerate(profile)}
+        self.profile = profile
+        self._lut = None
+        self._selectors = {}
+        self._boxes = {}
+        for name, rule in profile.items():
+            if not rule.get("hsv") and len(rule.get("rgb", ())) == 1:
+                lower, upper = (tuple(bound) for bound in rule["rgb"][0])
+                self._boxes[self.labels[name]] = (np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8),
+                                                  np.array(lower[::-1] + (0,), dtype=np.uint8),
+                                                  np.array(upper[::-1] + (255,), dtype=np.uint8))
+
+    def compile(self):
+        """
+        Build the lookup table now (at startup, say) rather than inside the first classify(). Returns self.
+        """
+        if self._lut is None:
+            self._lut = self._build_lut(self.profile)
+        return self
+
+    @property
+    def lut(self):
+        """
+        The label of every 24-bit colour, compiled on first use.
+        """
+        return self.compile()._lut
+
+    def _build_lut(self, profile):
+        rgb = _color_cube()
+        hsv = None
+        lut = np.zeros(rgb.shape[:2], dtype=np.uint8)
+        for name, rule in profile.items():
+            if rule.get("hsv") and hsv is None:
+                hsv = cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)
+            boxes = [(hsv, box) for box in rule.get("hsv", ())] + [(rgb, box) for box in rule.get("rgb", ())]
+            selected = None
+            for space, (lower, upper) in boxes:
+                inside = cv2.inRange(space, np.array(lower), np.array(upper))
+                selected = inside if selected is None else cv2.bitwise_and(selected, inside, dst=selected)
+            lut[selected > 0] |= self.labels[name]
+        return lut.ravel()
+
+    def bits(self, *names):
+        bits = 0
+        for name in names:
+            bits |= self.labels[name]
+        return bits
+
+    def classify(self, img, out=None):
+        """
+        Label image (uint8, one bit per label) for a BGRA frame from ScreenCapture or an RGB one.
+        """
+        if img.shape[2] == 3:
+            img = cv2.cvtColor(img, cv2.COLOR_RGB2BGRA)
+        elif img.strides[2] != 1 or img.strides[1] != 4:
+            img = np.ascontiguousarray(img)
+        keys = img.view("<u4")[..., 0] & _KEY_MASK
+        return np.take(self.lut, keys, out=out)
+
+    def mask(self, labels, *names):
+        """
+        255 where a pixel of the label image carries any of `names`, else 0.
+        """
+        bits = self.bits(*names)
+        selector = self._selectors.get(bits)
+        if selector is None:
+            selector = np.where(np.arange(256) & bits, 255, 0).astype(np.uint8)
+            self._selectors[bits] = selector
+        return cv2.LUT(labels, selector)
+
+    def match(self, img, *names):
+        """
+        classify() and mask() in one call, for when only one selection is needed.
+        """
+        box = self._boxes.get(self.bits(*names))
+        if box is not None:
+            rgb_lower, rgb_upper, bgra_lower, bgra_upper = box
+            if img.shape[2] == 3:
+                return cv2.inRange(img, rgb_lower, rgb_upper)
+            return cv2.inRange(img, bgra_lower, bgra_upper)
+        return self.mask(self.classify(img), *names)
+
+
+def classifier_for(profiles, flavor):
+    """
+    Classifier for one game flavour's profile ("retail", "cata", "classic", ...).
+    """
+    try:
+        profile = profiles[flavor]
+    except KeyError:
+        raise ValueError(f"No colour profile for {flavor!r}; known: {', '.join(profiles)}") from None
+    return ColorClassifier(profile)
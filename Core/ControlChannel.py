@@ -0,0 +1,156 @@
+# ControlChannel.py - Command channel between the UI and a running bot process
+
+import collections
+import json
+import threading
+from Core.EventLog import get_logger
+
+log = get_logger("control")
+
+COMMANDS = ("pause", "resume", "stop", "lure", "reload", "status")
+CONTROL_FLAG = "--control"  # bots started with this read commands from stdin
+
+
+def encode_command(cmd, **args):
+    """
+    One command as a JSON line, e.g. {"cmd": "pause"}.
+    """
+    return json.dumps({"cmd": cmd, **args}) + "\n"
+
+
+def decode_command(line):
+    """
+    (cmd, args) from a JSON line; a bare word such as "pause" also works for typing by hand.
+    Returns None for blank lines.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        message = json.loads(line)
+        return str(message.pop("cmd", "")).lower(), message
+    return line.split()[0].lower(), {}
+
+
+class BotControl:
+    """
+    Pause/stop state shared by a bot loop and whoever controls it.
+
+    Checking `paused` or `stopped` is a flag read, so the loop can look every
+    frame for free. wait_resumed() blocks while paused but returns the moment
+    the bot is resumed or stopped. One-shot actions that must run on the bot's
+    own thread (applying a lure, reloading) are queued with request() and
+    collected with take_requests() at a safe point in the loop.
+
+    `interrupt` is set by pause, stop and request, so waits that watch it
+    (see Core/Scheduler.py) end early; the loop clears it once handled.
+    """
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._stopped = threading.Event()
+        self._requests = collections.deque()
+        self.interrupt = threading.Event()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    @property
+    def interrupted(self):
+        return self.interrupt.is_set()
+
+    def clear_interrupt(self):
+        self.interrupt.clear()
+
+    def pause(self):
+        self._running.clear()
+        self.interrupt.set()
+
+    def resume(self):
+        self._running.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._running.set()  # wake anything waiting for resume
+        self.interrupt.set()
+
+    def wait_resumed(self, timeout=None):
+        """
+        Block while paused. Returns True once running (False on timeout or stop).
+        """
+        return self._running.wait(timeout) and not self.stopped
+
+    def wait_stopped(self, timeout=None):
+        """
+        Sleep for up to `timeout` seconds, waking early on stop. Returns True if stopped.
+        """
+        return self._stopped.wait(timeout)
+
+    @property
+    def has_requests(self):
+        return bool(self._requests)
+
+    def request(self, action):
+        self._requests.append(action)
+        self.interrupt.set()
+
+    def take(self, action):
+        """
+        Remove one queued `action`; True if there was one.
+        """
+        try:
+            self._requests.remove(action)
+        except ValueError:
+            return False
+        return True
+
+    def take_requests(self):
+        actions = []
+        while self._requests:
+            actions.append(self._requests.popleft())
+        return actions
+
+
+class ControlChannel:
+    """
+    Reads commands line by line from `stream` (the bot's stdin, a pipe from the UI)
+    on a daemon thread and calls `handlers[cmd](**args)`. `on_close` runs when
+    the other end goes away, so an orphaned bot can stop itself.
+    """
+
+    def __init__(self, stream, handlers, on_close=None):
+        self.stream = stream
+        self.handlers = handlers
+        self.on_close = on_close
+        self._thread = threading.Thread(target=self._run, name="ControlChannel", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        for line in iter(self.stream.readline, ""):
+            try:
+                decoded = decode_command(line)
+            except ValueError as e:
+                log.warning("control", f"⚠️ Bad control message {line.strip()!r}: {e}")
+                continue
+            if decoded is None:
+                continue
+            cmd, args = decoded
+            handler = self.handlers.get(cmd)
+            if handler is None:
+                log.warning("control", f"⚠️ Unknown command: {cmd}")
+                continue
+            try:
+                handler(**args)
+            except Exception as e:
+                log.error("control", f"❌ Command {cmd} failed: {e}")
+        if self.on_close is not None:
+            self.on_close()
@@ -0,0 +1,158 @@
+# EventLog.py - Leveled, structured event logging that never blocks the bot
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+ROOT_LOGGER = "fishing"
+LEVEL_ENV = "FISHING_LOG_LEVEL"
+
+
+class EventFormatter(logging.Formatter):
+    """
+    One line per event: `HH:MM:SS.mmm LEVEL [event] message key=value ...`.
+    The level is always the second token so log viewers can filter on it.
+    """
+
+    def __init__(self):
+        super().__init__("%(asctime)s.%(msecs)03d %(levelname)s [%(event)s] %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        if not hasattr(record, "event"):
+            record.event = "-"
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue: when the writer falls behind, records are dropped
+    (and counted) instead of stalling the thread that logged them.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Format in the background thread; only make sure lazy args are bound to this record
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EventLogger:
+    """
+    Thin wrapper over a stdlib logger: every call names an event type (cast, lock,
+    bite, timeout, template, ...) and may attach key=value fields. Messages use
+    %-style args, so a disabled level (e.g. per-template TRACE) costs one level check.
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def enabled(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def log(self, level, event, msg, *args, **fields):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg, *args, extra={"event": event, "fields": fields})
+
+    def trace(self, event, msg, *args, **fields):
+        self.log(TRACE, event, msg, *args, **fields)
+
+    def debug(self, event, msg, *args, **fields):
+        self.log(logging.DEBUG, event, msg, *args, **fields)
+
+    def info(self, event, msg, *args, **fields):
+        self.log(logging.INFO, event, msg, *args, **fields)
+
+    def warning(self, event, msg, *args, **fields):
+        self.log(logging.WARNING, event, msg, *args, **fields)
+
+    def error(self, event, msg, *args, **fields):
+        self.log(logging.ERROR, event, msg, *args, **fields)
+
+
+_listener = None
+_handler = None
+
+
+def get_logger(name):
+    return EventLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"))
+
+
+def set_level(level):
+    logging.getLogger(ROOT_LOGGER).setLevel(parse_level(level))
+
+
+def parse_level(level):
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return value
+
+
+def setup_logging(level="INFO", stream=None, max_queue=10000):
+    """
+    Route all bot loggers through a bounded queue to a background writer on
+    `stream` (stdout by default). The FISHING_LOG_LEVEL environment variable
+    overrides `level`, so chatter can be turned up or down without editing code.
+    Safe to call more than once; later calls only change the level.
+    """
+    global _listener, _handler
+    root = logging.getLogger(ROOT_LOGGER)
+    set_level(os.environ.get(LEVEL_ENV, level))
+    if _listener is not None:
+        return _handler
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(EventFormatter())
+    _handler = DroppingQueueHandler(queue.Queue(max_queue))
+    root.addHandler(_handler)
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(_handler.queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _handler
+
+
+def dropped_records():
+    """
+    Records dropped so far because the writer fell behind (0 before setup_logging).
+    """
+    return _handler.dropped if _handler is not None else 0
+
+
+def shutdown_logging():
+    """
+    Flush pending records and stop the background writer, reporting any records
+    the bounded queue had to drop.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        if _handler.dropped:
+            # The writer is stopped, so hand this one to its output directly
+            record = logging.makeLogRecord({
+                "name": f"{ROOT_LOGGER}.log", "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"⚠️ {_handler.dropped} log records were dropped (writer fell behind)", "event": "log",
+            })
+            for handler in _listener.handlers:
+                handler.handle(record)
+        _listener = None
@@ -0,0 +1,115 @@
+# FrameSource.py - Where the bots get their frames from (live screen or a recording)
+
+import os
+import numpy as np
+import cv2
+
+
+class FrameSource:
+    """
+    Interface for frame providers.
+
+    grab(region) returns a BGRA (height, width, 4) uint8 array of the screen
+    region (dict with left, top, width, height), or None once the source has
+    no more frames.
+    """
+
+    def grab(self, region):
+        raise NotImplementedError
+
+    def grab_rgb(self, region):
+        frame = self.grab(region)
+        if frame is None:
+            return None
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB)
+
+    def release_thread(self):
+        """
+        Free anything held for the calling thread; called by capture threads as they exit.
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class LiveFrameSource(FrameSource):
+    """
+    Grabs the real screen through ScreenCapture (mss, one handle per thread).
+    """
+
+    def __init__(self):
+        from Core.ScreenCapture import ScreenCapture  # needs mss and a display
+        self._capture = ScreenCapture()
+
+    def grab(self, region):
+        return self._capture.grab(region)
+
+    def release_thread(self):
+        self._capture.release_thread()
+
+    def close(self):
+        self._capture.close()
+
+
+def _to_bgra(frame):
+    if frame.ndim == 2:
+        return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGRA)
+    if frame.shape[2] == 3:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+    return frame
+
+
+class ReplayFrameSource(FrameSource):
+    """
+    Plays back a recorded frame sequence, one frame per grab().
+
+    Each recorded frame is a capture of a screen area whose top-left corner is
+    `origin` (screen coordinates). grab(region) returns the part of the current
+    frame covered by `region`, so full-region grabs and small ROI grabs both
+    work against the same recording. Frames may be 3-channel BGR (as written
+    by cv2.imwrite) or 4-channel BGRA (as returned by ScreenCapture).
+    """
+
+    def __init__(self, frames, origin, loop=False):
+        self._frames = frames
+        self.origin = origin
+        self.loop = loop
+        self.index = 0
+
+    @classmethod
+    def from_path(cls, path, origin, loop=False):
+        """
+        Load a recording from a directory of PNGs (played in filename order), an
+        .npy stack (N, H, W, C) or an .npz holding such a stack under "frames".
+        """
+        if os.path.isdir(path):
+            names = sorted(n for n in os.listdir(path) if n.lower().endswith(".png"))
+            frames = [cv2.imread(os.path.join(path, n), cv2.IMREAD_UNCHANGED) for n in names]
+            frames = [f for f in frames if f is not None]
+        elif path.lower().endswith(".npy"):
+            frames = np.load(path, mmap_mode="r")
+        elif path.lower().endswith(".npz"):
+            with np.load(path) as data:
+                frames = data["frames"] if "frames" in data else data[data.files[0]]
+        else:
+            raise ValueError(f"Unsupported recording: {path}")
+        return cls(frames, origin, loop=loop)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def grab(self, region):
+        if self.index >= len(self._frames):
+            if not self.loop or len(self._frames) == 0:
+                return None
+            self.index = 0
+        frame = _to_bgra(np.asarray(self._frames[self.index]))
+        self.index += 1
+        left = region["left"] - self.origin["left"]
+        top = region["top"] - self.origin["top"]
+        crop = frame[top:top + region["height"], left:left + region["width"]]
+        if left < 0 or top < 0 or crop.shape[:2] != (region["height"], region["width"]):
+            raise ValueError(f"Region {region} is outside the recorded area")
+        return crop
+
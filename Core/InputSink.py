@@ -0,0 +1,191 @@
+# InputSink.py - Where the bots send keys, mouse actions and window focus
+
+import json
+import time
+from Core.EventLog import get_logger
+
+log = get_logger("input")
+
+
+class InputSink:
+    """
+    Interface for everything the bots do to the game.
+
+    Besides keys and mouse, a sink owns pacing: the bots wait with wait() and
+    read the clock with now(), so a replay sink can run on a virtual clock
+    instead of sleeping in real time. The live clock is monotonic. wait_until()
+    can be cut short by a threading.Event. is_pressed() reports the user's hotkeys.
+    """
+
+    def key_down(self, key):
+        raise NotImplementedError
+
+    def key_up(self, key):
+        raise NotImplementedError
+
+    def press(self, key):
+        raise NotImplementedError
+
+    def move_to(self, x, y, duration=0.0):
+        raise NotImplementedError
+
+    def right_click(self):
+        raise NotImplementedError
+
+    def focus_game(self):
+        pass
+
+    def is_pressed(self, key):
+        return False
+
+    def wait(self, seconds):
+        time.sleep(seconds)
+
+    def wait_until(self, deadline, wake=None):
+        """
+        Wait until now() reaches `deadline`. Returns True if `wake` was set first.
+        """
+        delay = deadline - self.now()
+        if wake is None:
+            if delay > 0:
+                self.wait(delay)
+            return False
+        return wake.wait(max(0.0, delay))
+
+    def now(self):
+        return time.monotonic()
+
+
+class LiveInputSink(InputSink):
+    """
+    Drives the real game: cast keys go through pydirectinput (DirectInput scan
+    codes), single presses and the mouse through pyautogui, window focus
+    through win32gui and hotkeys through keyboard, exactly as the bots always did.
+    """
+
+    def __init__(self, window_title="World of Warcraft"):
+        # Windows-only input stack, imported here so the rest of the bot can run headless
+        import pyautogui
+        import pydirectinput
+        import keyboard
+        self._pyautogui = pyautogui
+        self._pydirectinput = pydirectinput
+        self._keyboard = keyboard
+        self.window_title = window_title
+        pyautogui.FAILSAFE = False
+        pydirectinput.PAUSE = 0.04
+        pydirectinput.FAILSAFE = False
+
+    def key_down(self, key):
+        self._pydirectinput.keyDown(key)
+
+    def key_up(self, key):
+        self._pydirectinput.keyUp(key)
+
+    def press(self, key):
+        self._pyautogui.press(key)
+
+    def move_to(self, x, y, duration=0.0):
+        self._pyautogui.moveTo(x, y, duration=duration)
+
+    def right_click(self):
+        self._pyautogui.rightClick()
+
+    def is_pressed(self, key):
+        return self._keyboard.is_pressed(key)
+
+    def print_window_titles(self):
+        import win32gui
+
+        def callback(hwnd, windows):
+            if win32gui.IsWindowVisible(hwnd):
+                title = win32gui.GetWindowText(hwnd)
+                if "Warcraft" in title or "World" in title:
+                    log.info("focus", f"Possible WoW window: '{title}' (hwnd: {hwnd})")
+        win32gui.EnumWindows(callback, None)
+
+    def focus_game(self):
+        import win32gui
+        import win32con
+        hwnd = win32gui.FindWindow(None, self.window_title)
+        if hwnd:
+            log.debug("focus", f"  → Found WoW hwnd: {hwnd}")
+            placement = win32gui.GetWindowPlacement(hwnd)
+            is_maximized = placement[1] == win32con.SW_SHOWMAXIMIZED
+            win32gui.ShowWindow(hwnd, win32con.SW_SHOW)
+            win32gui.SetForegroundWindow(hwnd)
+            time.sleep(0.1)
+            if is_maximized:
+                win32gui.ShowWindow(hwnd, win32con.SW_MAXIMIZE)
+                time.sleep(0.05)
+            self._pydirectinput.keyDown('alt')
+            time.sleep(0.05)
+            self._pydirectinput.keyUp('alt')
+            time.sleep(0.1)
+        else:
+            log.error("focus", "❌ WoW window NOT found! Check title.")
+
+
+class RecordingInputSink(InputSink):
+    """
+    Headless sink that logs every intended action instead of performing it.
+
+    Waits advance a virtual clock rather than sleeping, so a replayed session
+    runs as fast as detection allows while timestamps stay deterministic.
+    `pressed_keys` can be filled in to simulate held hotkeys. Events are kept
+    in `events` and, if `log_path` is given, appended there as JSON lines.
+    """
+
+    def __init__(self, log_path=None, start_time=0.0):
+        self.events = []
+        self.pressed_keys = set()
+        self.clock = start_time
+        self._log = open(log_path, "w", encoding="utf-8") if log_path else None
+
+    def _record(self, action, **fields):
+        event = {"t": round(self.clock, 4), "action": action, **fields}
+        self.events.append(event)
+        if self._log is not None:
+            self._log.write(json.dumps(event) + "\n")
+
+    def key_down(self, key):
+        self._record("key_down", key=key)
+
+    def key_up(self, key):
+        self._record("key_up", key=key)
+
+    def press(self, key):
+        self._record("press", key=key)
+
+    def move_to(self, x, y, duration=0.0):
+        self._record("move_to", x=int(x), y=int(y), duration=duration)
+        self.clock += duration
+
+    def right_click(self):
+        self._record("right_click")
+
+    def focus_game(self):
+        self._record("focus_game")
+
+    def is_pressed(self, key):
+        return key in self.pressed_keys
+
+    def wait(self, seconds):
+        self.clock += seconds
+
+    def wait_until(self, deadline, wake=None):
+        if wake is not None and wake.is_set():
+            return True
+        self.clock = max(self.clock, deadline)
+        return False
+
+    def now(self):
+        return self.clock
+
+    def clicks(self):
+        return [e for e in self.events if e["action"] == "right_click"]
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
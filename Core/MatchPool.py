@@ -0,0 +1,80 @@
+# MatchPool.py - Spread template matching for one frame over several cores
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from Core.TemplateMatcher import iter_matches
+
+_DONE = object()
+
+
+class MatchPool:
+    """
+    Thread pool that runs iter_matches over shards of the template list.
+
+    cv2.matchTemplate releases the GIL, so plain threads scale across cores.
+    They also share the frame and the decoded templates in memory, so nothing
+    is pickled or copied per call. With "interleaved" sharding, worker i gets
+    templates i, i+N, i+2N, ..., so the best-ranked templates (see
+    TemplateLibrary.hit_rate_order) are matched first on every core.
+    "contiguous" gives each worker one consecutive block.
+
+    Results are yielded as they complete. Closing the generator (the caller
+    stops iterating, e.g. on early exit) stops every worker after its
+    current template.
+    """
+
+    SHARDING = ("interleaved", "contiguous")
+
+    def __init__(self, workers, sharding="interleaved"):
+        if sharding not in self.SHARDING:
+            raise ValueError(f"Unknown sharding: {sharding}")
+        self.workers = max(1, workers)
+        self.sharding = sharding
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Matcher")
+
+    def shards(self, templates):
+        n = self.workers
+        if self.sharding == "interleaved":
+            shards = [templates[i::n] for i in range(n)]
+        else:
+            size = -(-len(templates) // n)
+            shards = [templates[i * size:(i + 1) * size] for i in range(n)]
+        return [shard for shard in shards if shard]
+
+    def iter_matches(self, img_gray, templates, blobs=None, bounds=None, scale=1, top_k=3, reject=1.0):
+        """
+        Same contract as TemplateMatcher.iter_matches, but in completion order.
+        """
+        stop = threading.Event()
+        results = queue.Queue()
+
+        def work(shard):
+            try:
+                for item in iter_matches(img_gray, shard, blobs, bounds, scale, top_k, reject):
+                    if stop.is_set():
+                        break
+                    results.put(item)
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(_DONE)
+
+        shards = self.shards(templates)
+        for shard in shards:
+            self._executor.submit(work, shard)
+        remaining = len(shards)
+        try:
+            while remaining:
+                item = results.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
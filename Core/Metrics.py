@@ -0,0 +1,243 @@
+# Metrics.py - Per-stage timings and event counters, exported as Prometheus text or JSON
+
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Core.EventLog import get_logger
+
+log = get_logger("metrics")
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """
+        Upper bucket bound containing quantile q (good enough for dashboards).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Stage duration histograms (capture, convert, mask, match, splash, click, ...)
+    and event counters (casts, locks, bites, timeouts, ...).
+
+    Time a stage with `with metrics.timer("match"):` or, where a block is
+    awkward, `start = metrics.start()` ... `metrics.stop("match", start)`.
+    While disabled, timer() returns a shared no-op and start() returns None,
+    so instrumented code costs an attribute check and nothing is recorded.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.time()
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage):
+        return _Timer(self, stage) if self.enabled else _NULL_TIMER
+
+    def start(self):
+        return time.perf_counter() if self.enabled else None
+
+    def stop(self, stage, start):
+        if start is not None:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, counter, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """
+        Plain-dict view: counters, and per stage count / mean / p50 / p90 / max in ms.
+        """
+        with self._lock:
+            stages = {}
+            for stage, h in sorted(self._histograms.items()):
+                stages[stage] = {
+                    "count": h.count,
+                    "mean_ms": round(h.total / h.count * 1e3, 3) if h.count else 0.0,
+                    "p50_ms": round(h.quantile(0.5) * 1e3, 3),
+                    "p90_ms": round(h.quantile(0.9) * 1e3, 3),
+                    "max_ms": round(h.max * 1e3, 3),
+                }
+            return {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "uptime_s": round(time.time() - self.started, 1),
+                "counters": dict(sorted(self._counters.items())),
+                "stages": stages,
+            }
+
+    def prometheus_text(self):
+        """
+        Everything in the Prometheus text exposition format.
+        """
+        lines = ["# TYPE fishing_events_total counter"]
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                lines.append(f'fishing_events_total{{event="{name}"}} {value}')
+            lines.append("# TYPE fishing_stage_seconds histogram")
+            for stage, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.counts):
+                    cumulative += n
+                    lines.append(f'fishing_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'fishing_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'fishing_stage_seconds_sum{{stage="{stage}"}} {h.total:.6f}')
+                lines.append(f'fishing_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path):
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("metrics", f"⚠️ Could not write metrics snapshot {path}: {e}")
+
+
+metrics = Metrics()
+
+_server = None
+_snapshot_stop = None
+
+
+def _handler_for(registry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, content_type = json.dumps(registry.snapshot()).encode("utf-8"), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = registry.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep scrapes out of the bot's log
+
+    return MetricsHandler
+
+
+def setup_metrics(enabled, port=0, snapshot_path=None, snapshot_interval=10.0):
+    """
+    Turn collection on and start the exporters: an HTTP endpoint on
+    127.0.0.1:`port` (/metrics for Prometheus, /metrics.json) and/or a JSON
+    file rewritten every `snapshot_interval` seconds. Port 0 / no path = off.
+    """
+    global _server, _snapshot_stop
+    metrics.enabled = enabled
+    if not enabled:
+        return
+    if port and _server is None:
+        try:
+            _server = ThreadingHTTPServer(("127.0.0.1", port), _handler_for(metrics))
+        except OSError as e:
+            log.warning("metrics", f"⚠️ Metrics endpoint unavailable on port {port}: {e}")
+        else:
+            threading.Thread(target=_server.serve_forever, name="MetricsHTTP", daemon=True).start()
+            log.info("metrics", f"📈 Metrics at http://127.0.0.1:{port}/metrics")
+    if snapshot_path and _snapshot_stop is None:
+        _snapshot_stop = threading.Event()
+
+        def write_loop(stop=_snapshot_stop):
+            while not stop.wait(snapshot_interval):
+                metrics.write_snapshot(snapshot_path)
+            metrics.write_snapshot(snapshot_path)
+
+        threading.Thread(target=write_loop, name="MetricsSnapshot", daemon=True).start()
+
+
+def shutdown_metrics():
+    """
+    Stop the exporters (the snapshot file gets one final write).
+    """
+    global _server, _snapshot_stop
+    if _server is not None:
+        _server.shutdown()
+        _server = None
+    if _snapshot_stop is not None:
+        _snapshot_stop.set()
+        _snapshot_stop = None
@@ -0,0 +1,182 @@
+# Pipeline.py - Capture -> detect -> act stages for the bite-monitoring loop
+
+import queue
+import threading
+import time
+import collections
+from Core.EventLog import get_logger
+from Core.Metrics import metrics
+
+log = get_logger("pipeline")
+
+
+class FrameFeed:
+    """
+    Interface between frame capture and detection.
+
+    next_frame(timeout) returns (seq, timestamp, frame) for the newest frame
+    the detector has not seen yet, or None if nothing arrived in time. `closed`
+    becomes True once the frame source is exhausted. Timestamps are on the
+    feed's now() clock. `captured`, `processed` and `dropped` count frames for
+    the end-of-monitor summary.
+    """
+
+    def __init__(self):
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.closed = False
+
+    def start(self):
+        pass
+
+    def next_frame(self, timeout=None):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def now(self):
+        return time.monotonic()
+
+    def stats(self):
+        return {"captured": self.captured, "processed": self.processed, "dropped": self.dropped}
+
+
+class InlineFrameFeed(FrameFeed):
+    """
+    Captures in the caller's thread, paced to one frame per `interval` on `clock`
+    (an InputSink). Deterministic, so it is what replays use.
+    """
+
+    def __init__(self, frame_source, region, interval, clock):
+        super().__init__()
+        self.frame_source = frame_source
+        self.region = region
+        self.interval = interval
+        self.clock = clock
+        self._seq = 0
+        self._next_tick = None
+
+    def now(self):
+        return self.clock.now()
+
+    def next_frame(self, timeout=None):
+        if self._next_tick is not None:
+            delay = self._next_tick - self.clock.now()
+            if delay > 0:
+                self.clock.wait(delay)
+        self._next_tick = self.clock.now() + self.interval
+        with metrics.timer("capture_roi"):
+            frame = self.frame_source.grab(self.region)
+        if frame is None:
+            self.closed = True
+            return None
+        self._seq += 1
+        self.captured += 1
+        self.processed += 1
+        return self._seq, self.clock.now(), frame
+
+
+class ThreadedFrameFeed(FrameFeed):
+    """
+    A capture thread grabs `region` every `interval` seconds into a small ring of
+    timestamped frames; the detector always takes the newest one.
+
+    Capture, detection and the click run concurrently, so bite-to-click latency
+    is bounded by one frame period plus detection time instead of the sum of
+    capture, conversion, detection and a fixed sleep. If detection falls
+    behind, older frames are overwritten (back-pressure by dropping) and counted.
+    """
+
+    def __init__(self, frame_source, region, interval, ring_size=3):
+        super().__init__()
+        self.frame_source = frame_source
+        self.region = region
+        self.interval = interval
+        self._ring = collections.deque(maxlen=ring_size)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._seq = 0
+        self._last_taken = 0
+        self._thread = threading.Thread(target=self._run, name="CaptureThread", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._capture_loop()
+        finally:
+            # A new feed (and thread) is made per cast; don't leave this thread's capture handle open
+            self.frame_source.release_thread()
+
+    def _capture_loop(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                with metrics.timer("capture_roi"):
+                    frame = self.frame_source.grab(self.region)
+            except Exception as e:
+                log.error("capture", f"❌ Capture failed: {e}")
+                frame = None
+            with self._cond:
+                if frame is None:
+                    self.closed = True
+                    self._cond.notify_all()
+                    return
+                self._seq += 1
+                self.captured += 1
+                self._ring.append((self._seq, time.monotonic(), frame))
+                self._cond.notify_all()
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_tick = time.monotonic()  # fell behind; don't try to catch up with a burst
+
+    def next_frame(self, timeout=None):
+        with self._cond:
+            ready = self._cond.wait_for(lambda: self._seq > self._last_taken or self.closed, timeout)
+            if not ready or self._seq == self._last_taken:
+                return None
+            seq, ts, frame = self._ring[-1]
+            self.dropped += seq - self._last_taken - 1
+            self._last_taken = seq
+            self.processed += 1
+            return seq, ts, frame
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
+
+class Actuator:
+    """
+    Executes game actions (the bite click and mouse move-away) on its own thread,
+    so detection never blocks on mouse-move durations. wait_idle() lets the
+    cycle hold the next cast until the previous actions are done.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="Actuator", daemon=True)
+        self._thread.start()
+
+    def submit(self, action, *args):
+        self._queue.put((action, args))
+
+    def wait_idle(self):
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            action, args = self._queue.get()
+            try:
+                action(*args)
+            except Exception as e:
+                log.error("act", f"❌ Action failed: {e}")
+            finally:
+                self._queue.task_done()
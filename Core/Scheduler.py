@@ -0,0 +1,70 @@
+# Scheduler.py - Deadline-based waits and the state machine runner for the fishing loop
+
+from Core.EventLog import get_logger
+from Core.Metrics import metrics
+
+log = get_logger("state")
+
+
+class Scheduler:
+    """
+    Waits expressed as deadlines on the input sink's clock (monotonic for the
+    live sink, virtual for replays).
+
+    wait_until() returns False as soon as `control` (a BotControl) is paused,
+    stopped or handed a request, so a pause ends a human break or
+    the post-cast wait immediately instead of when the sleep runs out.
+    Deadlines rather than durations keep periodic work on schedule: time
+    spent working between two waits is not added on top.
+    """
+
+    def __init__(self, sink, control):
+        self.sink = sink
+        self.control = control
+
+    def now(self):
+        return self.sink.now()
+
+    def deadline(self, seconds):
+        return self.sink.now() + seconds
+
+    def wait_until(self, deadline):
+        """
+        True once `deadline` is reached, False if an event preempted the wait.
+        """
+        if self.control.interrupted:
+            return False
+        return not self.sink.wait_until(deadline, self.control.interrupt)
+
+    def wait(self, seconds):
+        return self.wait_until(self.deadline(seconds))
+
+
+class StateMachine:
+    """
+    Runs state handlers until one returns None.
+
+    `states` maps a state name to a handler that does the state's work and
+    returns the next state's name. Each state's duration is recorded as the
+    "state_<name>" metric. When the control has been interrupted (pause,
+    stop, request), `on_interrupt(next_state)` decides where to go instead,
+    e.g. "PAUSED" or None to finish.
+    """
+
+    def __init__(self, states, initial, control, on_interrupt):
+        self.states = states
+        self.initial = initial
+        self.control = control
+        self.on_interrupt = on_interrupt
+        self.state = None
+
+    def run(self):
+        self.state = self.initial
+        while self.state is not None:
+            stage = metrics.start()
+            next_state = self.states[self.state]()
+            metrics.stop(f"state_{self.state.lower()}", stage)
+            if self.control.interrupted:
+                next_state = self.on_interrupt(next_state)
+            log.trace("transition", "%s → %s", self.state, next_state)
+            self.state = next_state
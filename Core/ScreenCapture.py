@@ -0,0 +1,67 @@
+# ScreenCapture.py - Long-lived screen grabber handing out NumPy frames
+
+import threading
+import numpy as np
+import cv2
+import mss
+
+
+class ScreenCapture:
+    """
+    Keeps one mss handle per thread for the life of the bot.
+
+    mss handles hold OS device contexts that are expensive to create and are not
+    safe to share between threads, so each thread lazily gets its own handle.
+    grab() returns the raw BGRA pixels as a (height, width, 4) NumPy view over
+    the mss buffer, without copying; grab_rgb() does a single conversion for
+    code that wants RGB.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._handles = []
+        self._lock = threading.Lock()
+
+    def _handle(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._handles.append(sct)
+        return sct
+
+    def grab(self, region):
+        """
+        BGRA frame of `region` (dict with left, top, width, height) as a zero-copy view.
+        """
+        shot = self._handle().grab(region)
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+    def grab_rgb(self, region):
+        """
+        RGB frame of `region` (one BGRA -> RGB conversion).
+        """
+        return cv2.cvtColor(self.grab(region), cv2.COLOR_BGRA2RGB)
+
+    def release_thread(self):
+        """
+        Close the calling thread's handle, for threads that exit before the bot does
+        (e.g. the per-cast capture thread). The next grab() on this thread opens a new one.
+        """
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            return
+        self._local.sct = None
+        with self._lock:
+            if sct not in self._handles:
+                return  # already closed by close()
+            self._handles.remove(sct)
+        sct.close()
+
+    def close(self):
+        with self._lock:
+            handles, self._handles = self._handles, []
+        for sct in handles:
+            sct.close()
+        self._local = threading.local()
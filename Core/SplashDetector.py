@@ -0,0 +1,130 @@
+# SplashDetector.py - Streaming bite detector with a rolling baseline
+
+import numpy as np
+import cv2
+
+
+class RollingStat:
+    """
+    Exponentially weighted mean and variance of a scalar stream.
+    """
+    __slots__ = ("alpha", "min_std", "mean", "var", "count")
+
+    def __init__(self, alpha, min_std):
+        self.alpha = alpha
+        self.min_std = min_std
+        self.reset()
+
+    def reset(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def z(self, value):
+        return (value - self.mean) / max(np.sqrt(self.var), self.min_std)
+
+    def update(self, value):
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            incr = self.alpha * diff
+            self.mean += incr
+            self.var = (1.0 - self.alpha) * (self.var + diff * incr)
+        self.count += 1
+
+
+class SplashDetector:
+    """
+    Decides per frame whether the bobber crop is splashing.
+
+    Two signals are tracked against rolling baselines (EMA mean/variance):
+      - mean brightness of the crop, scored as |z|, which catches the white splash;
+      - frame-difference energy, i.e. mean |pixel change| against the frame
+        `history` frames back in a ring buffer, which catches the bobber
+        dipping even when overall brightness barely moves.
+    With a ColorClassifier, the share of crop pixels carrying its `label`
+    (splash white) is tracked as a third signal, in percent of the crop.
+    A frame is a splash when any z-score reaches `z_threshold`. Baselines
+    only learn from non-splash frames, so water animation and lighting drift
+    are absorbed while a bite is not. `min_std` floors the spread so a
+    perfectly still scene doesn't turn sensor noise into huge z-scores.
+
+    All per-frame work happens in buffers allocated once per crop size.
+    update() takes the colour crop (BGRA from ScreenCapture, or RGB).
+    """
+
+    def __init__(self, history=4, alpha=0.1, z_threshold=4.0, min_std=1.0, warmup=3, classifier=None, label="splash"):
+        self.history = history
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.brightness = RollingStat(alpha, min_std)
+        self.energy = RollingStat(alpha, min_std)
+        self.whitewater = RollingStat(alpha, min_std)
+        self.classifier = classifier
+        self.label = label
+        self.last_z = (0.0, 0.0, 0.0)
+        self._shape = None
+        self._ring = None
+        self._gray = None
+        self._diff = None
+        self._labels = None
+        self._frames = 0
+
+    @property
+    def ready(self):
+        """
+        True once the baseline has seen enough frames to score them.
+        """
+        return self._frames > self.warmup
+
+    def reset(self):
+        """
+        Forget the baseline (call when monitoring a new bobber).
+        """
+        self.brightness.reset()
+        self.energy.reset()
+        self.whitewater.reset()
+        self.last_z = (0.0, 0.0, 0.0)
+        self._frames = 0
+
+    def _allocate(self, shape):
+        self._shape = shape
+        self._ring = np.zeros((self.history,) + shape, dtype=np.uint8)
+        self._gray = np.empty(shape, dtype=np.uint8)
+        self._diff = np.empty(shape, dtype=np.uint8)
+        self._labels = np.empty(shape, dtype=np.uint8)
+        self._frames = 0
+
+    def update(self, crop):
+        """
+        Feed one crop; returns True if it looks like a splash.
+        """
+        if crop.shape[:2] != self._shape:
+            self._allocate(crop.shape[:2])
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGRA2GRAY if crop.shape[2] == 4 else cv2.COLOR_RGB2GRAY, dst=self._gray)
+
+        slot = self._frames % self.history
+        reference = self._ring[slot] if self._frames >= self.history else self._ring[0]
+        brightness = cv2.mean(gray)[0]
+        energy = cv2.mean(cv2.absdiff(gray, reference, dst=self._diff))[0] if self._frames else 0.0
+        whitewater = 0.0
+        if self.classifier is not None:
+            labels = self.classifier.classify(crop, out=self._labels)
+            whitewater = 100.0 * cv2.countNonZero(self.classifier.mask(labels, self.label)) / labels.size
+
+        splash = False
+        if self.ready:
+            z_brightness = abs(self.brightness.z(brightness))
+            z_energy = self.energy.z(energy)
+            z_whitewater = self.whitewater.z(whitewater)
+            self.last_z = (z_brightness, z_energy, z_whitewater)
+            splash = max(z_brightness, z_energy, z_whitewater) >= self.z_threshold
+        if not splash:
+            self.brightness.update(brightness)
+            self.whitewater.update(whitewater)
+            if self._frames:
+                self.energy.update(energy)
+        self._ring[slot] = gray
+        self._frames += 1
+        return splash
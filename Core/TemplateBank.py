@@ -0,0 +1,245 @@
+# TemplateBank.py - In-memory store of decoded bobber templates
+
+import json
+import os
+import threading
+import numpy as np
+import cv2
+from Core.EventLog import get_logger
+
+log = get_logger("templates")
+
+
+class ScaledTemplate:
+    """
+    Grayscale-only downsampled copy of a template, for coarse pyramid levels.
+    """
+    __slots__ = ("gray", "norm")
+
+    def __init__(self, gray):
+        self.gray = gray
+        self.norm = float(np.sqrt(np.sum(np.square(gray, dtype=np.float64))))
+
+    @property
+    def shape(self):
+        return self.gray.shape
+
+
+class Template:
+    """
+    A single decoded bobber template (colour + grayscale) and the file it came from.
+    """
+    __slots__ = ("name", "path", "mtime", "color", "gray", "norm", "_scaled")
+
+    def __init__(self, name, path, mtime, color, gray=None, norm=None):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.color = color
+        self.gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY) if gray is None else gray
+        self.norm = float(np.sqrt(np.sum(np.square(self.gray, dtype=np.float64)))) if norm is None else norm
+        self._scaled = {}
+
+    @property
+    def shape(self):
+        return self.gray.shape
+
+    def scaled(self, factor):
+        """
+        This template shrunk by `factor` (INTER_AREA), computed once and cached.
+        """
+        scaled = self._scaled.get(factor)
+        if scaled is None:
+            h, w = self.gray.shape
+            size = (max(1, w // factor), max(1, h // factor))
+            scaled = ScaledTemplate(cv2.resize(self.gray, size, interpolation=cv2.INTER_AREA))
+            self._scaled[factor] = scaled
+        return scaled
+
+
+class TemplateBank:
+    """
+    Loads the template folder once and keeps the decoded arrays in memory.
+
+    refresh() only decodes files that are new or whose mtime changed, and drops
+    templates whose file was removed, so it is cheap enough to call every cast.
+    Templates written by the bot itself can be registered with add() so they are
+    never read back from disk.
+
+    With `cache` on, save_cache() packs the decoded templates into
+    template_dir/.cache: one colour and one grayscale .npy stack per template
+    shape plus a JSON manifest (filename, mtime, norm). The first refresh()
+    memory-maps those stacks instead of decoding every PNG, so startup costs a
+    directory scan, and other processes reading the same cache share its pages.
+    Only shapes whose templates changed are rewritten.
+    """
+
+    CACHE_VERSION = 1
+
+    def __init__(self, template_dir, cache=True):
+        self.template_dir = template_dir
+        self.cache_dir = os.path.join(template_dir, ".cache") if cache else None
+        self._templates = {}  # filename -> Template
+        self._lock = threading.Lock()
+        self._manifest = None  # last manifest read or written
+
+    # ------------------------------------------------------------------
+    # Packed cache
+    # ------------------------------------------------------------------
+    def _manifest_path(self):
+        return os.path.join(self.cache_dir, "manifest.json")
+
+    def _load_cache(self):
+        """
+        Populate the bank from the packed cache. Returns the number of templates mapped.
+        """
+        self._manifest = {"version": self.CACHE_VERSION, "generation": 0, "shapes": {}}
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            log.warning("template", f"⚠️ Ignoring unreadable template cache: {e}")
+            return 0
+        if manifest.get("version") != self.CACHE_VERSION:
+            return 0
+
+        loaded = {}
+        for key, entry in manifest["shapes"].items():
+            try:
+                colors = np.load(os.path.join(self.cache_dir, entry["color"]), mmap_mode="r")
+                grays = np.load(os.path.join(self.cache_dir, entry["gray"]), mmap_mode="r")
+            except (OSError, ValueError) as e:
+                log.warning("template", f"⚠️ Template cache stack {key} unreadable, will rebuild: {e}")
+                continue
+            if len(colors) != len(entry["names"]) or len(grays) != len(entry["names"]):
+                continue
+            for i, (name, mtime, norm) in enumerate(zip(entry["names"], entry["mtimes"], entry["norms"])):
+                loaded[name] = Template(name, os.path.join(self.template_dir, name), mtime,
+                                        colors[i], grays[i], norm)
+            self._manifest["shapes"][key] = entry
+        self._manifest["generation"] = manifest.get("generation", 0)
+        with self._lock:
+            self._templates.update(loaded)
+        return len(loaded)
+
+    def save_cache(self):
+        """
+        Write the packed cache for every template shape that changed since it was
+        last written. Returns the number of shape stacks written.
+        """
+        if self.cache_dir is None:
+            return 0
+        if self._manifest is None:
+            self._load_cache()
+        by_shape = {}
+        for template in self.templates():
+            by_shape.setdefault("%dx%d" % template.shape, []).append(template)
+
+        manifest = {"version": self.CACHE_VERSION, "generation": self._manifest["generation"] + 1, "shapes": {}}
+        written = 0
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for key, group in by_shape.items():
+                names = [t.name for t in group]
+                mtimes = [t.mtime for t in group]
+                previous = self._manifest["shapes"].get(key)
+                if previous and previous["names"] == names and previous["mtimes"] == mtimes:
+                    manifest["shapes"][key] = previous
+                    continue
+                # New file names per generation: a stack that is still mapped can't be overwritten on Windows
+                stem = f"{key}_{manifest['generation']}"
+                np.save(os.path.join(self.cache_dir, stem + ".color.npy"), np.stack([t.color for t in group]))
+                np.save(os.path.join(self.cache_dir, stem + ".gray.npy"), np.stack([t.gray for t in group]))
+                manifest["shapes"][key] = {"color": stem + ".color.npy", "gray": stem + ".gray.npy",
+                                           "names": names, "mtimes": mtimes, "norms": [t.norm for t in group]}
+                written += 1
+            if not written and manifest["shapes"].keys() == self._manifest["shapes"].keys():
+                return 0
+            tmp_path = self._manifest_path() + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self._manifest_path())
+        except OSError as e:
+            log.warning("template", f"⚠️ Could not write template cache: {e}")
+            return 0
+        self._manifest = manifest
+
+        referenced = {"manifest.json"}
+        for entry in manifest["shapes"].values():
+            referenced.update((entry["color"], entry["gray"]))
+        for name in os.listdir(self.cache_dir):
+            if name not in referenced:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass  # still mapped somewhere; removed on a later save
+        log.debug("template", f"Template cache: {written} shape stacks written ({len(by_shape)} shapes)")
+        return written
+
+    def refresh(self):
+        """
+        Sync the bank with the template folder. Returns the number of templates decoded.
+        """
+        if not os.path.exists(self.template_dir):
+            log.warning("template", f"❌ Template dir missing: {self.template_dir}")
+            os.makedirs(self.template_dir)
+        if self.cache_dir is not None and self._manifest is None:
+            mapped = self._load_cache()
+            if mapped:
+                log.debug("template", f"Mapped {mapped} templates from {self.cache_dir}")
+
+        decoded = 0
+        seen = set()
+        with os.scandir(self.template_dir) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith(".png") or not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                mtime = entry.stat().st_mtime_ns
+                current = self._templates.get(entry.name)
+                if current is not None and current.mtime == mtime:
+                    continue
+                color = cv2.imread(entry.path, cv2.IMREAD_COLOR)
+                if color is None:
+                    continue
+                with self._lock:
+                    self._templates[entry.name] = Template(entry.name, entry.path, mtime, color)
+                decoded += 1
+
+        with self._lock:
+            for name in [n for n in self._templates if n not in seen]:
+                del self._templates[name]
+        return decoded
+
+    def add(self, path, color):
+        """
+        Register a template that was just written to `path` (BGR array) without re-reading it.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        name = os.path.basename(path)
+        template = Template(name, path, mtime, color)
+        with self._lock:
+            self._templates[name] = template
+        return template
+
+    def discard(self, path):
+        """
+        Forget the template stored at `path` (e.g. after the file was deleted).
+        """
+        with self._lock:
+            self._templates.pop(os.path.basename(path), None)
+
+    def templates(self):
+        """
+        Snapshot of all loaded templates, ordered by filename.
+        """
+        with self._lock:
+            return [self._templates[name] for name in sorted(self._templates)]
+
+    def __len__(self):
+        return len(self._templates)
@@ -0,0 +1,257 @@
+# TemplateLibrary.py - Keeps the auto-saved template set small and useful
+
+import json
+import os
+import shutil
+import time
+import numpy as np
+import cv2
+from Core.EventLog import get_logger
+
+log = get_logger("templates")
+
+
+def perceptual_hash(gray):
+    """
+    64-bit difference hash of a grayscale template (9x8 downscale, horizontal gradient sign).
+    """
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class TemplateLibrary:
+    """
+    Scores, de-duplicates and caps the templates held by a TemplateBank.
+
+    Every template matched against a cast is charged a try, and every template
+    that agrees on a locked position earns a hit. Both decay with a half-life,
+    and a template's value is its hit rate, (hits + prior_hits) / (tries +
+    prior_tries), weighted towards recent use. The prior gives templates that
+    were never tried (new crops) a middling rate, so they are tried before
+    templates that keep failing and can earn credit despite the early exit;
+    when the bank grows past `max_templates` (None = no cap) the
+    lowest-valued auto-saved crops are moved to `archive_dir`. Only crops with
+    recorded usage are evicted, so a library that has no stats yet (first run)
+    is left alone until its templates have had a chance to match. Manual saves
+    and hand-picked screenshots (anything not matching `evictable_prefix`) are
+    never evicted.
+    """
+
+    def __init__(self, bank, stats_path, archive_dir, max_templates=300,
+                 dedup_distance=5, dedup_correlation=0.97, min_age=900,
+                 half_life=3600, evictable_prefix="bobber_success_", prior_hits=1.0, prior_tries=2.0,
+                 save_interval=300):
+        self.bank = bank
+        self.stats_path = stats_path
+        self.archive_dir = archive_dir
+        self.max_templates = max_templates
+        self.dedup_distance = dedup_distance
+        self.dedup_correlation = dedup_correlation
+        self.min_age = min_age
+        self.half_life = half_life
+        self.evictable_prefix = evictable_prefix
+        self.prior_hits = prior_hits
+        self.prior_tries = prior_tries
+        self.save_interval = save_interval
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._hashes = {}  # filename -> (mtime, hash)
+        self._stats = {}   # filename -> {"hits": decayed count, "tries": decayed count, "last": epoch seconds}
+        self.load_stats()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def load_stats(self):
+        if not os.path.exists(self.stats_path):
+            return
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                self._stats = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("template", f"⚠️ Could not read template stats {self.stats_path}: {e}")
+            self._stats = {}
+
+    def save_stats(self):
+        tmp_path = self.stats_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._stats, f)
+            os.replace(tmp_path, self.stats_path)
+            self._dirty = False
+        except OSError as e:
+            log.warning("template", f"⚠️ Could not write template stats {self.stats_path}: {e}")
+        self._saved_at = time.monotonic()
+
+    def save_stats_if_due(self):
+        """
+        Write the stats if they changed and `save_interval` seconds have passed
+        since the last write, so per-cast bookkeeping stays off the disk.
+        Call save_stats() at shutdown to keep the rest.
+        """
+        if self._dirty and time.monotonic() - self._saved_at >= self.save_interval:
+            self.save_stats()
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+    def _decayed(self, name, now):
+        """
+        (hits, tries) for a template, decayed to `now`. Stats written before tries were counted read as all hits.
+        """
+        entry = self._stats.get(name)
+        if entry is None:
+            return 0.0, 0.0
+        decay = 0.5 ** ((now - entry["last"]) / self.half_life)
+        return entry["hits"] * decay, entry.get("tries", entry["hits"]) * decay
+
+    def hit_rate(self, name, now=None):
+        now = time.time() if now is None else now
+        hits, tries = self._decayed(name, now)
+        return (hits + self.prior_hits) / (tries + self.prior_tries)
+
+    def value(self, template, now=None):
+        """
+        (hit rate, last use) for a template; higher sorts as more valuable.
+        """
+        now = time.time() if now is None else now
+        entry = self._stats.get(template.name)
+        last = entry["last"] if entry is not None else template.mtime / 1e9
+        return self.hit_rate(template.name, now), last
+
+    def record_tries(self, names):
+        """
+        Charge a try to every template that was matched against a cast.
+        """
+        now = time.time()
+        for name in names:
+            hits, tries = self._decayed(name, now)
+            self._stats[name] = {"hits": hits, "tries": tries + 1.0, "last": now}
+        if names:
+            self._dirty = True
+
+    def record_match(self, names):
+        """
+        Credit every template that contributed to an agreeing match (call after record_tries).
+        """
+        now = time.time()
+        for name in names:
+            hits, tries = self._decayed(name, now)
+            self._stats[name] = {"hits": hits + 1.0, "tries": max(tries, hits + 1.0), "last": now}
+        if names:
+            self._dirty = True
+
+    def hit_rate_order(self, templates):
+        """
+        Templates sorted best hit rate first (used to try likely templates early).
+        """
+        now = time.time()
+        return sorted(templates, key=lambda t: self.value(t, now), reverse=True)
+
+    def forget(self, path):
+        name = os.path.basename(path)
+        if self._stats.pop(name, None) is not None:
+            self._dirty = True
+        self._hashes.pop(name, None)
+
+    # ------------------------------------------------------------------
+    # De-duplication
+    # ------------------------------------------------------------------
+    def _hash_of(self, template):
+        cached = self._hashes.get(template.name)
+        if cached is not None and cached[0] == template.mtime:
+            return cached[1]
+        value = perceptual_hash(template.gray)
+        self._hashes[template.name] = (template.mtime, value)
+        return value
+
+    def _hash_matrix(self, templates):
+        return np.array([self._hash_of(t) for t in templates], dtype=np.uint64)
+
+    @staticmethod
+    def _hamming(hashes, value):
+        diff = np.bitwise_xor(hashes, np.uint64(value))
+        return np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+    def _correlates(self, gray_a, gray_b):
+        if gray_a.shape != gray_b.shape:
+            return True  # hash agreement is all we can go on for different crop sizes
+        score = cv2.matchTemplate(gray_a, gray_b, cv2.TM_CCOEFF_NORMED)[0, 0]
+        return score >= self.dedup_correlation
+
+    def find_duplicate(self, gray):
+        """
+        Name of an existing template that is a near-copy of `gray`, or None.
+        """
+        templates = self.bank.templates()
+        if not templates:
+            return None
+        distances = self._hamming(self._hash_matrix(templates), perceptual_hash(gray))
+        for idx in np.argsort(distances, kind="stable"):
+            if distances[idx] > self.dedup_distance:
+                break
+            if self._correlates(gray, templates[idx].gray):
+                return templates[idx].name
+        return None
+
+    def deduplicate(self):
+        """
+        Archive evictable templates that are near-copies of a more valuable one. Returns count.
+        """
+        now = time.time()
+        templates = sorted(self.bank.templates(), key=lambda t: (not self._evictable(t), self.value(t, now)), reverse=True)
+        hashes = self._hash_matrix(templates)
+        removed = np.zeros(len(templates), dtype=bool)
+        archived = 0
+        for i, keeper in enumerate(templates):
+            if removed[i]:
+                continue
+            distances = self._hamming(hashes[i + 1:], hashes[i])
+            for j in np.nonzero(distances <= self.dedup_distance)[0] + i + 1:
+                candidate = templates[j]
+                if removed[j] or not self._evictable(candidate):
+                    continue
+                if self._correlates(keeper.gray, candidate.gray):
+                    removed[j] = True
+                    archived += self._archive(candidate)
+        if archived:
+            log.info("template", f"🧹 Archived {archived} duplicate templates")
+        return archived
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+    def _evictable(self, template):
+        return template.name.startswith(self.evictable_prefix)
+
+    def _archive(self, template):
+        try:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            shutil.move(template.path, os.path.join(self.archive_dir, template.name))
+        except OSError as e:
+            log.warning("template", f"⚠️ Could not archive {template.path}: {e}")
+            return 0
+        self.bank.discard(template.path)
+        self.forget(template.path)
+        return 1
+
+    def prune(self):
+        """
+        Evict the lowest-valued auto-saved templates until the bank is under the cap. Returns count.
+        """
+        if self.max_templates is None:
+            return 0
+        templates = self.bank.templates()
+        excess = len(templates) - self.max_templates
+        if excess <= 0:
+            return 0
+        now = time.time()
+        candidates = [t for t in templates
+                      if self._evictable(t) and t.name in self._stats and now - self.value(t, now)[1] >= self.min_age]
+        candidates.sort(key=lambda t: self.value(t, now))
+        evicted = sum(self._archive(t) for t in candidates[:excess])
+        if evicted:
+            log.info("template", f"🧹 Evicted {evicted} low-value templates ({len(self.bank)} kept)")
+            self.save_stats()
+        return evicted
@@ -0,0 +1,271 @@
+# TemplateMatcher.py - Multi-template TM_SQDIFF_NORMED matching with shared per-frame work
+
+import numpy as np
+import cv2
+
+
+def window_sums(integral, h, w):
+    """
+    Sum of every h x w window from a summed-area table (as returned by cv2.integral).
+    """
+    return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+
+
+def mask_integral(mask):
+    """
+    Summed-area table of the non-zero pixels of `mask`, for count_in_windows.
+    """
+    return cv2.integral((mask > 0).view(np.uint8), sdepth=cv2.CV_32S)
+
+
+def count_in_windows(mask, locs, shapes, integral=None):
+    """
+    Non-zero pixel count of `mask` inside each window (top-left `locs` as (x, y),
+    size `shapes` as (h, w)), in one vectorized pass. Pass a precomputed
+    mask_integral() to count many small batches against the same mask.
+    """
+    counts = np.zeros(len(locs), dtype=np.int64)
+    if len(locs) == 0:
+        return counts
+    if integral is None:
+        integral = mask_integral(mask)
+    locs = np.asarray(locs, dtype=np.int64)
+    shapes = np.asarray(shapes, dtype=np.int64)
+    x0, y0 = locs[:, 0], locs[:, 1]
+    y1 = np.minimum(y0 + shapes[:, 0], mask.shape[0])
+    x1 = np.minimum(x0 + shapes[:, 1], mask.shape[1])
+    counts[:] = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+    return counts
+
+
+class FrameMatcher:
+    """
+    Matches any number of templates against one grayscale frame.
+
+    cv2.matchTemplate(TM_SQDIFF_NORMED) recomputes the frame's squared-sum
+    integral on every call. Here it is computed once per frame and the window
+    energy is shared by every template of the same shape; each template then
+    only costs one cross-correlation (TM_CCORR) plus a few in-place array ops.
+    Scores agree with TM_SQDIFF_NORMED to float32 precision.
+    """
+
+    def __init__(self, img_gray):
+        self.img_gray = img_gray
+        self._sqsum = cv2.integral2(img_gray, sdepth=cv2.CV_64F)[1]
+        self._windows = {}  # (h, w) -> (1 / sqrt(window energy), sqrt(window energy))
+
+    def _window_terms(self, shape):
+        terms = self._windows.get(shape)
+        if terms is None:
+            root = np.sqrt(window_sums(self._sqsum, *shape)).astype(np.float32)
+            terms = (1.0 / np.maximum(root, 1e-3), root)
+            self._windows[shape] = terms
+        return terms
+
+    def fits(self, template):
+        h, w = template.shape
+        return h <= self.img_gray.shape[0] and w <= self.img_gray.shape[1]
+
+    def score_map(self, template):
+        """
+        TM_SQDIFF_NORMED result map for one template.
+        """
+        inv_root, root = self._window_terms(template.shape)
+        k = max(template.norm, 1e-6)
+        ccorr = cv2.matchTemplate(self.img_gray, template.gray, cv2.TM_CCORR)
+        # (|T|^2 + |I|^2 - 2 T.I) / (|T| |I|)  ==  k/|I| + |I|/k - (2/k) T.I/|I|
+        cv2.multiply(ccorr, inv_root, dst=ccorr)
+        result = cv2.addWeighted(inv_root, k, root, 1.0 / k, 0.0)
+        cv2.scaleAdd(ccorr, -2.0 / k, result, dst=result)
+        return cv2.min(result, 1.0, dst=result)
+
+    def best(self, template):
+        """
+        (min score, (x, y) of top-left corner) for one template.
+        """
+        min_val, _, min_loc, _ = cv2.minMaxLoc(self.score_map(template))
+        return min_val, min_loc
+
+    def match_all(self, templates):
+        """
+        Best score and location for every template, grouped by shape.
+
+        Returns (scores, locs): float array (inf for templates larger than the
+        frame) and an (N, 2) int array of top-left (x, y).
+        """
+        scores = np.full(len(templates), np.inf)
+        locs = np.zeros((len(templates), 2), dtype=np.int64)
+        by_shape = {}
+        for idx, template in enumerate(templates):
+            by_shape.setdefault(template.shape, []).append(idx)
+        for shape, indices in by_shape.items():
+            if not self.fits(templates[indices[0]]):
+                continue
+            for idx in indices:
+                scores[idx], locs[idx] = self.best(templates[idx])
+        return scores, locs
+
+
+def match_templates(img_gray, templates):
+    """
+    Convenience wrapper: best (scores, locs) of every template against one frame.
+    """
+    return FrameMatcher(img_gray).match_all(templates)
+
+
+class PyramidMatcher:
+    """
+    Coarse-to-fine matching against one grayscale image.
+
+    Each template is first scored on a copy of the image shrunk by `scale`
+    (against the template shrunk the same way, i.e. 1/scale^4 of the work).
+    The `top_k` best separate coarse hits are then refined with an exact
+    TM_SQDIFF_NORMED search in a small full-resolution neighbourhood, and the
+    best refined score is returned. Coarse hits scoring `reject` or worse are
+    not refined (their coarse score is returned), since a template that can't
+    get close at low resolution won't pass at full resolution either.
+    scale=1 is plain full-resolution matching.
+    """
+
+    MIN_COARSE_SIDE = 8  # Smaller coarse templates carry too little detail; match those at full size
+
+    def __init__(self, img_gray, scale=2, top_k=3, reject=1.0):
+        self.img_gray = img_gray
+        self.scale = scale
+        self.top_k = top_k
+        self.reject = reject
+        self._full = None
+        self._coarse = None
+        h, w = img_gray.shape
+        if scale > 1 and min(h, w) // scale >= self.MIN_COARSE_SIDE:
+            self._coarse = FrameMatcher(cv2.resize(img_gray, (w // scale, h // scale), interpolation=cv2.INTER_AREA))
+
+    def fits(self, template):
+        h, w = template.shape
+        return h <= self.img_gray.shape[0] and w <= self.img_gray.shape[1]
+
+    def _full_best(self, template):
+        if self._full is None:
+            self._full = FrameMatcher(self.img_gray)
+        return self._full.best(template)
+
+    def best(self, template):
+        """
+        (min score, (x, y) of top-left corner) for one template.
+        """
+        if self._coarse is None:
+            return self._full_best(template)
+        small = template.scaled(self.scale)
+        if min(small.shape) < self.MIN_COARSE_SIDE or not self._coarse.fits(small):
+            return self._full_best(template)
+
+        s = self.scale
+        h, w = template.shape
+        img_h, img_w = self.img_gray.shape
+        coarse = self._coarse.score_map(small)
+        best_val, best_loc = np.inf, (0, 0)
+        for _ in range(self.top_k):
+            coarse_val, _, (cx, cy), _ = cv2.minMaxLoc(coarse)
+            if coarse_val >= self.reject:
+                if best_val == np.inf:
+                    best_val, best_loc = coarse_val, (cx * s, cy * s)
+                break
+            x0, y0 = max(0, cx * s - s), max(0, cy * s - s)
+            x1, y1 = min(img_w, cx * s + w + s), min(img_h, cy * s + h + s)
+            if x1 - x0 >= w and y1 - y0 >= h:
+                result = cv2.matchTemplate(self.img_gray[y0:y1, x0:x1], template.gray, cv2.TM_SQDIFF_NORMED)
+                val, _, (rx, ry), _ = cv2.minMaxLoc(result)
+                if val < best_val:
+                    best_val, best_loc = val, (x0 + rx, y0 + ry)
+            # Suppress this peak so the next pass finds a separate location
+            sh, sw = small.shape
+            cv2.rectangle(coarse, (cx - sw // 2, cy - sh // 2), (cx + sw // 2, cy + sh // 2), 1.0, -1)
+        return best_val, best_loc
+
+
+def iter_matches(img_gray, templates, blobs=None, bounds=None, scale=1, top_k=3, reject=1.0):
+    """
+    Yield (template, score, (x, y)) for each template, in the order given.
+
+    With `blobs`, each template is only searched in the blob_windows for its
+    shape; otherwise the whole frame is searched. See PyramidMatcher for
+    `scale`, `top_k` and `reject`. Matching is lazy, so a
+    caller that has seen enough (e.g. agreeing templates) can simply stop
+    iterating and the remaining templates are never scored. Templates that
+    fit no window yield inf.
+    """
+    full_frame = [(0, 0, img_gray.shape[1], img_gray.shape[0])]
+    windows_by_shape = {}
+    matchers = {}
+    for template in templates:
+        windows = windows_by_shape.get(template.shape)
+        if windows is None:
+            windows = full_frame if blobs is None else blob_windows(blobs, template.shape, img_gray.shape, bounds)
+            windows_by_shape[template.shape] = windows
+        best_val, best_loc = np.inf, (0, 0)
+        for window in windows:
+            matcher = matchers.get(window)
+            if matcher is None:
+                x0, y0, x1, y1 = window
+                matcher = matchers[window] = PyramidMatcher(img_gray[y0:y1, x0:x1], scale, top_k, reject)
+            if not matcher.fits(template):
+                continue
+            val, (x, y) = matcher.best(template)
+            if val < best_val:
+                best_val, best_loc = val, (x + window[0], y + window[1])
+        yield template, best_val, best_loc
+
+
+def merge_rects(rects):
+    """
+    Union overlapping (x0, y0, x1, y1) rectangles until none overlap.
+    """
+    rects = [list(r) for r in rects]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(len(rects) - 1, i, -1):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del rects[j]
+                    merged = True
+    return [tuple(r) for r in rects]
+
+
+def candidate_blobs(mask, min_pixels, max_pixels, merge_px=9):
+    """
+    Bounding boxes (x, y, w, h) of the blobs in `mask` that could be the bobber.
+
+    Nearby fragments (feather and tip) are joined by dilating `merge_px` before
+    labelling; a blob is kept if its own mask pixel count lies within
+    [min_pixels, max_pixels].
+    """
+    grown = cv2.dilate(mask, np.ones((merge_px, merge_px), np.uint8)) if merge_px > 1 else mask
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(grown, connectivity=8)
+    pixels = np.bincount(labels[mask > 0], minlength=count)
+    return [tuple(int(v) for v in stats[label, :4]) for label in range(1, count)
+            if min_pixels <= pixels[label] <= max_pixels]
+
+
+def blob_windows(blobs, template_shape, frame_shape, bounds=None):
+    """
+    Search windows (x0, y0, x1, y1) for templates of one (h, w) shape.
+
+    Each blob box is grown by the template size so the window holds every
+    placement that overlaps the blob; blobs no such placement could centre
+    inside `bounds` are skipped, and overlapping windows are merged.
+    """
+    h, w = template_shape
+    frame_h, frame_w = frame_shape[:2]
+    windows = []
+    for bx, by, bw, bh in blobs:
+        if bounds is not None:
+            if bx + bw + w // 2 < bounds["min_x"] or bx - w // 2 > bounds["max_x"]:
+                continue
+            if by + bh + h // 2 < bounds["min_y"] or by - h // 2 > bounds["max_y"]:
+                continue
+        windows.append((max(0, bx - w + 1), max(0, by - h + 1),
+                        min(frame_w, bx + bw + w - 1), min(frame_h, by + bh + h - 1)))
+    return merge_rects(windows)
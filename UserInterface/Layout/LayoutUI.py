@@ -1,5 +1,6 @@
 import sys
 import os
+import collections
 import subprocess  # For running external scripts
 
 # Correctly set the project root (two levels up from LayoutUI.py)
@@ -9,22 +10,34 @@ if project_root not in sys.path:
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout,
-    QTextEdit, QHBoxLayout, QDesktopWidget
+    QPlainTextEdit, QHBoxLayout, QDesktopWidget, QComboBox, QLabel
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, QTimer
+from PyQt5.QtGui import QTextCursor
+from Core.ControlChannel import encode_command, CONTROL_FLAG
+
+MAX_LOG_LINES = 5000     # The log view keeps only this many lines (oldest are dropped)
+LOG_FLUSH_MS = 100       # How often queued lines are pushed into the view
+LOG_LEVELS = {"TRACE": 5, "DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+STOP_GRACE_MS = 3000     # How long the bot gets to exit after "stop" before it is terminated
+STOP_POLL_MS = 100       # How often the UI checks whether it has exited
 
 class OutputReaderThread(QThread):
-    new_text = pyqtSignal(str)
+    """
+    Reads a pipe line by line into `queue` (a deque shared with the LogWindow).
+    No Qt signal per line: the window drains the queue in batches on a timer.
+    """
 
-    def __init__(self, pipe):
+    def __init__(self, pipe, queue):
         super().__init__()
         self.pipe = pipe
+        self.queue = queue
 
     def run(self):
         # Read lines until the pipe is closed.
         for line in iter(self.pipe.readline, ""):
             if line:
-                self.new_text.emit(line.rstrip())
+                self.queue.append(line.rstrip())
         self.pipe.close()
 
 class ButtonWindow(QWidget):
@@ -32,8 +45,11 @@ class ButtonWindow(QWidget):
         super().__init__()
         self.log_window = log_window  # Reference to the log window
         self.auto_fish_process = None  # Holds the AutoFish.py process when running
+        self.paused = False
         self.stdout_thread = None
         self.stderr_thread = None
+        self.stopping = False
+        self.after_stop = []  # Callbacks to run once the process has exited
         self.init_ui()
 
     def init_ui(self):
@@ -47,13 +63,19 @@ class ButtonWindow(QWidget):
         self.btn_play = QPushButton("Play")
         self.btn_pause = QPushButton("Pause")  # This button toggles Pause/Resume
         self.btn_stop = QPushButton("Stop")      # This button stops the fishing program
+        self.btn_lure = QPushButton("Apply Lure")
+        self.btn_reload = QPushButton("Reload Settings")
+        self.btn_status = QPushButton("Status")
         self.btn_settings = QPushButton("Settings")
         self.btn_close = QPushButton("Close")
 
         # Connect buttons to functions
         self.btn_play.clicked.connect(self.start_auto_fish)
         self.btn_pause.clicked.connect(self.toggle_pause)
-        self.btn_stop.clicked.connect(self.stop_auto_fish)
+        self.btn_stop.clicked.connect(lambda: self.stop_auto_fish())  # clicked passes `checked`
+        self.btn_lure.clicked.connect(lambda: self.send_command("lure"))
+        self.btn_reload.clicked.connect(lambda: self.send_command("reload"))
+        self.btn_status.clicked.connect(lambda: self.send_command("status"))
         self.btn_settings.clicked.connect(self.show_settings)
         self.btn_close.clicked.connect(self.close_both_windows)
 
@@ -61,6 +83,9 @@ class ButtonWindow(QWidget):
         layout.addWidget(self.btn_play)
         layout.addWidget(self.btn_pause)
         layout.addWidget(self.btn_stop)
+        layout.addWidget(self.btn_lure)
+        layout.addWidget(self.btn_reload)
+        layout.addWidget(self.btn_status)
         layout.addWidget(self.btn_settings)
         layout.addWidget(self.btn_close)
         layout.addStretch()  # Push buttons to the top
@@ -75,16 +100,15 @@ class ButtonWindow(QWidget):
             # Correct path to the AutoFish.py script within the Core folder
             auto_fish_path = os.path.join(project_root, 'Core', 'AutoFish.py')
             
-            # Remove any existing pause flag (in case it was left from a previous session)
-            pause_file = os.path.join(project_root, 'pause_flag.txt')
-            if os.path.exists(pause_file):
-                os.remove(pause_file)
-                self.btn_pause.setText("Pause")
+            self.paused = False
+            self.btn_pause.setText("Pause")
 
-            # Start the AutoFish process with pipes for stdout and stderr.
+            # Start the AutoFish process with pipes for stdout and stderr, and stdin
+            # as its control channel (see Core/ControlChannel.py).
             # The "-u" flag forces unbuffered mode.
             self.auto_fish_process = subprocess.Popen(
-                [python_path, "-u", auto_fish_path],
+                [python_path, "-u", auto_fish_path, CONTROL_FLAG],
+                stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,                # Same as universal_newlines=True
@@ -92,71 +116,124 @@ class ButtonWindow(QWidget):
                 errors="replace",         # Replace undecodable characters
                 bufsize=1
             )
-            self.log_window.log_text.append("AutoFish started!")
+            self.log_window.append("AutoFish started!")
 
             # Start threads to capture output from stdout and stderr.
-            self.stdout_thread = OutputReaderThread(self.auto_fish_process.stdout)
-            self.stdout_thread.new_text.connect(self.log_window.log_text.append)
+            self.stdout_thread = OutputReaderThread(self.auto_fish_process.stdout, self.log_window.pending)
             self.stdout_thread.start()
 
-            self.stderr_thread = OutputReaderThread(self.auto_fish_process.stderr)
-            self.stderr_thread.new_text.connect(self.log_window.log_text.append)
+            self.stderr_thread = OutputReaderThread(self.auto_fish_process.stderr, self.log_window.pending)
             self.stderr_thread.start()
         else:
-            self.log_window.log_text.append("AutoFish is already running.")
+            self.log_window.append("AutoFish is already running.")
 
 
+    def send_command(self, cmd):
+        """
+        Send a control command (pause, resume, stop, lure, reload, status) to the running bot.
+        Returns False if the bot isn't running or the pipe is gone.
+        """
+        if self.auto_fish_process is None or self.auto_fish_process.poll() is not None:
+            self.log_window.append("AutoFish is not running.")
+            return False
+        try:
+            self.auto_fish_process.stdin.write(encode_command(cmd))
+            self.auto_fish_process.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            self.log_window.append(f"Could not send '{cmd}' to AutoFish.")
+            return False
+        return True
+
     def toggle_pause(self):
         """
-        Toggle the fishing bot between pause and resume.
-        This works by creating or removing a pause flag file.
+        Toggle the fishing bot between pause and resume over the control channel.
         """
-        pause_file = os.path.join(project_root, 'pause_flag.txt')
-        if os.path.exists(pause_file):
-            # Resume the fishing bot
-            os.remove(pause_file)
-            self.log_window.log_text.append("Resuming fishing...")
-            self.btn_pause.setText("Pause")
+        if self.paused:
+            if self.send_command("resume"):
+                self.paused = False
+                self.log_window.append("Resuming fishing...")
+                self.btn_pause.setText("Pause")
         else:
-            # Pause the fishing bot
-            with open(pause_file, "w") as f:
-                f.write("paused")
-            self.log_window.log_text.append("Fishing paused.")
-            self.btn_pause.setText("Resume")
+            if self.send_command("pause"):
+                self.paused = True
+                self.log_window.append("Fishing paused.")
+                self.btn_pause.setText("Resume")
 
-    def stop_auto_fish(self):
+    def stop_auto_fish(self, then=None):
         """
         Stop the AutoFish process without closing the UI.
-        This terminates the AutoFish process (if running) so the fishing program stops.
+        Asks the bot to stop cleanly and checks on a timer whether it has exited,
+        terminating it only if it is still alive after STOP_GRACE_MS. The UI stays
+        responsive meanwhile; `then` is called once the process is gone.
         """
-        if self.auto_fish_process is not None and self.auto_fish_process.poll() is None:
+        if callable(then):
+            self.after_stop.append(then)
+        if self.auto_fish_process is None or self.auto_fish_process.poll() is not None:
+            if not self.stopping:
+                self.log_window.append("AutoFish is not running.")
+                self._stopped()
+            return
+        if self.stopping:
+            return
+        self.stopping = True
+        self.send_command("stop")
+        self.log_window.append("Stopping AutoFish...")
+        self._wait_for_exit(STOP_GRACE_MS // STOP_POLL_MS)
+
+    def _wait_for_exit(self, polls_left):
+        if self.auto_fish_process.poll() is None:
+            if polls_left > 0:
+                QTimer.singleShot(STOP_POLL_MS, lambda: self._wait_for_exit(polls_left - 1))
+                return
             self.auto_fish_process.terminate()  # Terminate the fishing program
-            self.log_window.log_text.append("AutoFish stopped!")
-            self.auto_fish_process = None
-            # Optionally, wait for the threads to finish.
-            if self.stdout_thread is not None:
-                self.stdout_thread.wait()
-            if self.stderr_thread is not None:
-                self.stderr_thread.wait()
-            # Reset the pause button text in case it was in 'Resume' mode.
-            self.btn_pause.setText("Pause")
-        else:
-            self.log_window.log_text.append("AutoFish is not running.")
+            self.log_window.append("AutoFish did not stop in time, terminated.")
+        self.log_window.append("AutoFish stopped!")
+        self.auto_fish_process = None
+        # The readers end once the pipes close, which happens as the process exits.
+        for thread in (self.stdout_thread, self.stderr_thread):
+            if thread is not None:
+                thread.wait(1000)
+        # Reset the pause button text in case it was in 'Resume' mode.
+        self.paused = False
+        self.btn_pause.setText("Pause")
+        self.stopping = False
+        self._stopped()
+
+    def _stopped(self):
+        callbacks, self.after_stop = self.after_stop, []
+        for callback in callbacks:
+            callback()
 
     def show_settings(self):
         # Placeholder for settings functionality.
-        self.log_window.log_text.append("Settings clicked.")
+        self.log_window.append("Settings clicked.")
 
     def close_both_windows(self):
-        # Optionally, also stop the AutoFish process before closing.
-        self.stop_auto_fish()
+        # Stop the AutoFish process first; the windows close once it has exited.
+        self.stop_auto_fish(then=self.close_windows)
+
+    def close_windows(self):
         self.close()
         self.log_window.close()
 
 class LogWindow(QWidget):
+    """
+    Bounded log view: output readers queue lines in `pending`, a timer appends
+    them in one batch every LOG_FLUSH_MS, and the view holds at most
+    MAX_LOG_LINES, so memory stays flat over a multi-hour session. The level
+    box hides lines below the chosen level (the bot's log lines carry the level
+    as their second token; lines without one, like tracebacks, always show).
+    """
+
     def __init__(self):
         super().__init__()
+        self.pending = collections.deque(maxlen=MAX_LOG_LINES)
+        self.history = collections.deque(maxlen=MAX_LOG_LINES)
+        self.min_level = 0
         self.init_ui()
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start(LOG_FLUSH_MS)
 
     def init_ui(self):
         self.setWindowTitle("Message Log")
@@ -165,15 +242,57 @@ class LogWindow(QWidget):
         self.setStyleSheet("")
         
         layout = QVBoxLayout()
+
+        filter_row = QHBoxLayout()
+        filter_row.addWidget(QLabel("Show:"))
+        self.level_filter = QComboBox()
+        self.level_filter.addItems(["ALL"] + list(LOG_LEVELS))
+        self.level_filter.currentTextChanged.connect(self.set_level_filter)
+        filter_row.addWidget(self.level_filter)
+        filter_row.addStretch()
+        layout.addLayout(filter_row)
         
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setStyleSheet("background-color: #2E2E2E; color: white;")
         self.log_text.setReadOnly(True)
+        self.log_text.setUndoRedoEnabled(False)
+        self.log_text.setMaximumBlockCount(MAX_LOG_LINES)
         self.log_text.setPlaceholderText("Message log will appear here...")
         
         layout.addWidget(self.log_text)
         self.setLayout(layout)
 
+    def visible(self, line):
+        if not self.min_level:
+            return True
+        parts = line.split(" ", 2)
+        level = LOG_LEVELS.get(parts[1]) if len(parts) > 1 else None
+        return level is None or level >= self.min_level
+
+    def append(self, line):
+        """
+        Show a UI message right away (bot output goes through `pending`).
+        """
+        self.history.append(line)
+        if self.visible(line):
+            self.log_text.appendPlainText(line)
+
+    def flush(self):
+        lines = []
+        while self.pending:
+            lines.append(self.pending.popleft())
+        if not lines:
+            return
+        self.history.extend(lines)
+        shown = [line for line in lines if self.visible(line)]
+        if shown:
+            self.log_text.appendPlainText("\n".join(shown))
+
+    def set_level_filter(self, name):
+        self.min_level = LOG_LEVELS.get(name, 0)
+        self.log_text.setPlainText("\n".join(line for line in self.history if self.visible(line)))
+        self.log_text.moveCursor(QTextCursor.End)
+
 def main():
     app = QApplication(sys.argv)
     
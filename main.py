@@ -2,30 +2,26 @@
 import time
 import threading
 import numpy as np
-import pyautogui
 import cv2
-from PIL import Image
-import mss
-import keyboard
 import os
 import random
-import pydirectinput
-import win32gui
-import win32con
-
-pyautogui.FAILSAFE = False
-pydirectinput.PAUSE = 0.04
-pydirectinput.FAILSAFE = False
-
-def print_window_titles():
-    def callback(hwnd, windows):
-        if win32gui.IsWindowVisible(hwnd):
-            title = win32gui.GetWindowText(hwnd)
-            if "Warcraft" in title or "World" in title:
-                print(f"Possible WoW window: '{title}' (hwnd: {hwnd})")
-    win32gui.EnumWindows(callback, None)
-
-print_window_titles()
+from Core.TemplateBank import TemplateBank
+from Core.TemplateLibrary import TemplateLibrary
+from Core.TemplateMatcher import iter_matches, candidate_blobs, mask_integral, count_in_windows
+from Core.FrameSource import LiveFrameSource
+from Core.InputSink import LiveInputSink
+from Core.ArtifactWriter import ArtifactWriter
+from Core.MatchPool import MatchPool
+from Core.Pipeline import InlineFrameFeed, ThreadedFrameFeed, Actuator
+from Core.ControlChannel import BotControl
+from Core.Scheduler import Scheduler, StateMachine
+from Core.SplashDetector import SplashDetector
+from Core.BobberTracker import BobberTracker
+from Core.ChangeGate import ChangeGate
+from Core.ColorClassifier import classifier_for
+from Core.Metrics import metrics, setup_metrics, shutdown_metrics
+from Core.EventLog import get_logger, setup_logging, shutdown_logging, dropped_records, TRACE
+from Config.Settings import COLOR_PROFILES, GAME_FLAVOR
 
 # ====================================================
 # CONFIGURATION
@@ -44,7 +40,20 @@ BOBBER_AREA_BOUNDS = {
 BOBBER_CROP_SIZE = 70
 INTENSITY_CHANGE_THRESHOLD = 4
 CONFIRMATION_FRAMES = 3
+SPLASH_DETECTOR = "adaptive"   # "adaptive" (rolling baseline + frame differencing) or "intensity" (Δ vs first frame)
+SPLASH_Z_THRESHOLD = 4.0       # Adaptive: std-devs above the rolling baseline that count as a splash
+SPLASH_HISTORY = 4             # Adaptive: frame differences are taken against the frame this many back
+SPLASH_BASELINE_ALPHA = 0.1    # Adaptive: how fast the baseline follows water/lighting drift
+SPLASH_WHITEWATER = True       # Adaptive: also track the share of splash-white pixels (colour profile "splash" label)
+ADAPTIVE_CONFIRMATION_FRAMES = 2
 INTERVAL = 0.1
+ACQUIRE_MIN_WAIT = 1.0         # Seconds after the cast before polling for the bobber (it is still in the air)
+ACQUIRE_INTERVAL = 0.1         # Seconds between full-area polls while the bobber lands
+ACQUIRE_SETTLE_PX = 3          # A red blob that moved no more than this since the last poll is at rest
+ACQUIRE_SETTLE_FRAMES = 2      # Consecutive polls with every red blob at rest before matching templates
+ACQUIRE_RETRIES = 3            # Full matches tried on later polls before giving up on the cast
+ACQUIRE_UNSETTLED_AFTER = 2.6  # Seconds after the cast to match anyway if the blobs never settle (old fixed wait)
+ACQUIRE_TIMEOUT = 4.0          # Seconds after the cast to keep polling
 TIMEOUT = 20
 SESSION_LIMIT = 14200
 RANDOM_BREAK_CHANCE = 0.10
@@ -54,324 +63,646 @@ SAVE_DIR = r"D:\fishingtrainer"
 POSITION_AGREEMENT_PX = 30
 MIN_AGREEING_TEMPLATES = 2
 MOUSE_MOVE_DURATION = 0.15
+MONITOR_ROI_PADDING = 15  # Extra pixels around the bobber crop grabbed while watching for a bite (also how far it can be tracked)
+TRACK_BOBBER = True       # Follow the bobber inside the ROI; the splash crop and the click move with it
+TRACK_SEARCH_PX = 8       # Max bobber movement per frame the tracker searches
+TRACK_MAX_SCORE = 0.3     # Tracking matches worse than this (splash, occlusion) keep the last position
+CHANGE_GATE = True        # Skip splash detection/tracking on ROI frames that match the last analysed one
+CHANGE_GATE_THRESHOLD = 6 # Gray levels a 16px cell of the ROI must change by to count (noise/shimmer stays below)
+MONITOR_PIPELINE = True   # Capture on its own thread while monitoring; False = grab/detect/sleep in one loop
+PIPELINE_RING_SIZE = 3    # Timestamped frames buffered between capture and detection (newest wins)
 SQDIFF_ACCEPT = 0.85
 MIN_RED_PIXELS_FOR_MATCH = 50  # Raised to kill false positives
+CANDIDATE_PREFILTER = True     # Only match templates in windows around red/purple blobs
+CANDIDATE_MERGE_PX = 9         # Blob fragments closer than this are treated as one candidate
+CANDIDATE_MAX_BLOB_PIXELS = BOBBER_CROP_SIZE * BOBBER_CROP_SIZE  # Bigger red areas can't be the bobber
+PYRAMID_SCALE = 2              # Score templates on a 1/N-size image first (1 = full resolution only)
+PYRAMID_TOP_K = 2              # Coarse hits per template refined at full resolution
+EARLY_EXIT_SCORE = 0.25        # Stop once MIN_AGREEING_TEMPLATES matches this good agree (0 = try every template)
+MATCH_WORKERS = 1              # Threads matching templates in parallel (1 = match in the calling thread)
+MATCH_SHARDING = "interleaved" # "interleaved" (every core starts on the best templates) or "contiguous"
+LOG_LEVEL = "INFO"             # TRACE shows every template accept/discard; FISHING_LOG_LEVEL env var overrides
+METRICS_ENABLED = False        # Per-stage timings and counters (see Core/Metrics.py)
+METRICS_PORT = 9109            # http://127.0.0.1:PORT/metrics (Prometheus) and /metrics.json; 0 = no endpoint
+METRICS_SNAPSHOT_PATH = None   # Also rewrite this JSON file every METRICS_SNAPSHOT_INTERVAL seconds
+METRICS_SNAPSHOT_INTERVAL = 10
+
+# Debug images (latest_masked/latest_cast/latest_comparison) are written on a background thread
+ARTIFACT_EVERY_NTH_CAST = 1    # Only keep artifacts for every Nth cast
+ARTIFACT_FAILURES_ONLY = False # Only keep artifacts when the bobber was not locked
+ARTIFACT_FORMAT = "png"        # "png", or "npy" for raw arrays with no encoding cost
+ARTIFACT_PNG_COMPRESSION = 1   # 0-9, lower = faster
+ARTIFACT_QUEUE_SIZE = 6        # Pending artifacts beyond this drop the oldest
+
+MAX_TEMPLATES = 300            # Cap on templates kept in TEMPLATE_DIR (auto-saved crops with usage stats get evicted; None = no cap)
+TEMPLATE_DEDUP_DISTANCE = 5    # Max perceptual-hash bit difference for a crop to count as a duplicate
+TEMPLATE_MIN_AGE = 900         # Seconds a new/recently used template is protected from eviction
+TEMPLATE_HIT_HALF_LIFE = 3600  # Seconds for a template's hit count to decay by half
+TEMPLATE_STATS_SAVE_INTERVAL = 300  # Seconds between writes of template_stats.json (always written at shutdown)
+TEMPLATE_CACHE = True          # Pack decoded templates into TEMPLATE_DIR/.cache and memory-map them at startup
+
+# Decoded templates stay in memory; only new/changed files are read on later casts (see init_templates)
+template_bank = None
+template_library = None
+
+# Backends: main() installs the live screen/keyboard/mouse ones, replays install their own
+# (see Core/FrameSource.py, Core/InputSink.py and Benchmarks/ReplayRun.py)
+frame_source = None
+input_sink = None
+
+artifact_writer = ArtifactWriter(max_queue=ARTIFACT_QUEUE_SIZE, every_nth=ARTIFACT_EVERY_NTH_CAST,
+                                 failures_only=ARTIFACT_FAILURES_ONLY, fmt=ARTIFACT_FORMAT,
+                                 png_compression=ARTIFACT_PNG_COMPRESSION)
+actuator = Actuator()
+match_pool = MatchPool(MATCH_WORKERS, MATCH_SHARDING) if MATCH_WORKERS > 1 else None
+color_classifier = classifier_for(COLOR_PROFILES, GAME_FLAVOR)  # feather/tip/splash labels, see Config/Settings.py
+splash_detector = SplashDetector(history=SPLASH_HISTORY, alpha=SPLASH_BASELINE_ALPHA, z_threshold=SPLASH_Z_THRESHOLD,
+                                 classifier=color_classifier if SPLASH_WHITEWATER else None)
+bobber_tracker = BobberTracker(BOBBER_CROP_SIZE, TRACK_SEARCH_PX, TRACK_MAX_SCORE)
+change_gate = ChangeGate(threshold=CHANGE_GATE_THRESHOLD)
+cast_count = 0
 
-running = True
-paused = False
+log = get_logger("main")
+
+# Pause/stop events; waits scheduled through `scheduler` end early on either of them
+control = BotControl()
+scheduler = None
+cycle = {}  # State of the current cast, handed from state to state (see fishing_cycle)
+session_start = None
 initial_intensity = None
 break_start_time = None
 last_intensity_print = 0
 last_time_print = 0
-
-def activate_wow_window():
-    hwnd = win32gui.FindWindow(None, "World of Warcraft")
-    if hwnd:
-        print(f"  → Found WoW hwnd: {hwnd}")
-        placement = win32gui.GetWindowPlacement(hwnd)
-        is_maximized = placement[1] == win32con.SW_SHOWMAXIMIZED
-        win32gui.ShowWindow(hwnd, win32con.SW_SHOW)
-        win32gui.SetForegroundWindow(hwnd)
-        time.sleep(0.1)
-        if is_maximized:
-            win32gui.ShowWindow(hwnd, win32con.SW_MAXIMIZE)
-            time.sleep(0.05)
-        pydirectinput.keyDown('alt')
-        time.sleep(0.05)
-        pydirectinput.keyUp('alt')
-        time.sleep(0.1)
-    else:
-        print("❌ WoW window NOT found! Check title.")
+published_drops = {}  # metrics counter -> total already published (see publish_drop_counts)
 
 # ====================================================
 # HELPER FUNCTIONS
 # ====================================================
+def to_gray(img_np):
+    # 4-channel frames come straight from ScreenCapture (BGRA); 3-channel ones are RGB
+    return cv2.cvtColor(img_np, cv2.COLOR_BGRA2GRAY if img_np.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+
+def to_bgr(img_np):
+    return cv2.cvtColor(img_np, cv2.COLOR_BGRA2BGR if img_np.shape[2] == 4 else cv2.COLOR_RGB2BGR)
+
 def ensure_save_dir():
     if not os.path.exists(SAVE_DIR):
         os.makedirs(SAVE_DIR)
 
+def init_templates(template_dir=TEMPLATE_DIR):
+    global template_bank, template_library
+    template_bank = TemplateBank(template_dir, cache=TEMPLATE_CACHE)
+    template_library = TemplateLibrary(template_bank,
+                                       os.path.join(template_dir, "template_stats.json"),
+                                       os.path.join(template_dir, "evicted"),
+                                       max_templates=MAX_TEMPLATES,
+                                       dedup_distance=TEMPLATE_DEDUP_DISTANCE,
+                                       min_age=TEMPLATE_MIN_AGE,
+                                       half_life=TEMPLATE_HIT_HALF_LIFE,
+                                       save_interval=TEMPLATE_STATS_SAVE_INTERVAL)
+    template_bank.refresh()
+    template_library.deduplicate()
+    template_library.prune()
+    template_bank.save_cache()
+    log.info("template", f"🔍 Loaded {len(template_bank)} templates")
+
 def load_templates():
-    templates = []
-    if not os.path.exists(TEMPLATE_DIR):
-        print(f"❌ Template dir missing: {TEMPLATE_DIR}")
-        os.makedirs(TEMPLATE_DIR)
-        return []
-    for filename in os.listdir(TEMPLATE_DIR):
-        if filename.lower().endswith(".png"):
-            path = os.path.join(TEMPLATE_DIR, filename)
-            template = cv2.imread(path, cv2.IMREAD_COLOR)
-            if template is not None:
-                templates.append((template, filename))
-    print(f"🔍 Loaded {len(templates)} templates")
-    return templates
-
-def find_bobber(img):
+    decoded = template_bank.refresh()
+    if decoded:
+        log.info("template", f"🔍 Loaded {decoded} new templates ({len(template_bank)} total)")
+    return template_bank.templates()
+
+def render_mask(img_np, red_mask):
+    # Debug: white feather on black background
+    debug_vis = np.zeros_like(img_np[:, :, :3])
+    debug_vis[red_mask > 0] = [255, 255, 255]
+    return debug_vis
+
+def render_comparison(img_np, agreeing, best_x, best_y):
+    marked_img = to_bgr(img_np)
+    for _, ax, ay, afname, _ in agreeing:
+        cv2.circle(marked_img, (ax, ay), 10, (0, 0, 255), 2)
+        short_name = os.path.splitext(afname)[0][:12]
+        cv2.putText(marked_img, short_name, (ax + 12, ay), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+    cv2.circle(marked_img, (best_x, best_y), 15, (0, 255, 0), 3)
+    cv2.rectangle(marked_img,
+                  (BOBBER_AREA_BOUNDS["min_x"], BOBBER_AREA_BOUNDS["min_y"]),
+                  (BOBBER_AREA_BOUNDS["max_x"], BOBBER_AREA_BOUNDS["max_y"]),
+                  (255, 0, 0), 2)
+    return marked_img
+
+def queue_debug_artifacts(img_np, red_mask, found, agreeing=(), best_x=None, best_y=None):
+    # Rendering and encoding happen on the artifact writer thread, not here
+    if not artifact_writer.sample(cast_count, not found):
+        return
+    artifact_writer.submit(os.path.join(SAVE_DIR, "latest_masked.png"),
+                           lambda: render_mask(img_np, red_mask), "MASK DEBUG (white = detected feather)")
+    artifact_writer.submit(os.path.join(SAVE_DIR, "latest_cast.png"),
+                           lambda: to_bgr(img_np), "Raw cast saved")
+    if DEBUG and found:
+        artifact_writer.submit(os.path.join(SAVE_DIR, "latest_comparison.png"),
+                               lambda: render_comparison(img_np, agreeing, best_x, best_y), "Comparison debug saved")
+
+def bobber_mask(img_np):
+    # Purple feather or orange/red tip, both above the SV floor that rejects deep blue water.
+    # The ranges are in the active colour profile (Config/Settings.py), precompiled into one lookup table.
+    return color_classifier.match(img_np, "feather", "tip")
+
+def bobber_blobs(red_mask):
+    return candidate_blobs(red_mask, MIN_RED_PIXELS_FOR_MATCH, CANDIDATE_MAX_BLOB_PIXELS, CANDIDATE_MERGE_PX)
+
+def blob_centers(blobs):
+    # Centres of the candidate blobs that lie inside BOBBER_AREA_BOUNDS
+    b = BOBBER_AREA_BOUNDS
+    centers = [(bx + bw // 2, by + bh // 2) for bx, by, bw, bh in blobs]
+    return [(cx, cy) for cx, cy in centers if b["min_x"] <= cx <= b["max_x"] and b["min_y"] <= cy <= b["max_y"]]
+
+def blobs_at_rest(centers, previous):
+    # True when there is a blob and none of them moved more than ACQUIRE_SETTLE_PX since the last poll
+    return bool(centers) and all(any(abs(cx - px) <= ACQUIRE_SETTLE_PX and abs(cy - py) <= ACQUIRE_SETTLE_PX
+                                     for px, py in previous)
+                                 for cx, cy in centers)
+
+def find_bobber(img, red_mask=None, blobs=None):
+    # red_mask/blobs: already computed for this frame by the acquisition poll (see acquire_bobber)
     try:
-        img_np = np.array(img)
-        print("DEBUG: Entering find_bobber - img shape:", img_np.shape if img_np is not None else "None!")
+        img_np = np.asarray(img)
+        log.debug("cast", "Entering find_bobber - img shape: %s", img_np.shape)
         
         templates = load_templates()
-        print("DEBUG: Loaded templates count:", len(templates))
+        log.debug("cast", "Loaded templates count: %d", len(templates))
         if not templates:
-            print("❌ No templates loaded!")
+            log.error("template", "❌ No templates loaded!")
             return False, None, None, img_np, None
         
-        hsv_img = cv2.cvtColor(img_np, cv2.COLOR_RGB2HSV)
+        stage = metrics.start()
+        img_gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
+        metrics.stop("convert", stage)
         
-            # Expanded ranges to catch the duller red/purple in deep blue water
-            # Purple Feather: Lowered Value/Saturation to catch it in shadows
-        mask_feather_purple = cv2.inRange(hsv_img, np.array([120, 40, 40]), np.array([170, 255, 255]))
-
-        # Orange/Red Tip: Lowered Saturation floor since water 'mutes' the colors
-        mask_tip_orange = cv2.inRange(hsv_img, np.array([0, 50, 50]), np.array([20, 255, 255]))
-
-        # Combined mask
-        red_mask = cv2.bitwise_or(mask_feather_purple, mask_tip_orange)
-
-        # CRITICAL: Lower the SV floor for dark water
-        # Deep blue water has a high 'V' (Value) but low 'S' (Saturation) 
-        # compared to the bobber.
-        sv_mask = cv2.inRange(hsv_img, np.array([0, 40, 40]), np.array([180, 255, 255]))
-        red_mask = cv2.bitwise_and(red_mask, sv_mask)
+        if red_mask is None:
+            stage = metrics.start()
+            red_mask = bobber_mask(img_np)
+            metrics.stop("mask", stage)
         
         highlighted_pixels = cv2.countNonZero(red_mask)
         quality_note = "(good - strong feather)" if highlighted_pixels >= 50 else "(weak - tune ranges?)"
-        print(f"Highlighted red/orange pixels: {highlighted_pixels} {quality_note}")
+        log.debug("cast", "Highlighted red/orange pixels: %d %s", highlighted_pixels, quality_note)
         
         if highlighted_pixels < 15:
-            print("⚠️ Very few red/orange pixels — bobber feather probably NOT detected.")
+            log.warning("cast", "⚠️ Very few red/orange pixels — bobber feather probably NOT detected.")
         elif highlighted_pixels < 50:
-            print("🟡 Weak feather detection — consider widening HSV ranges slightly.")
+            log.warning("cast", "🟡 Weak feather detection — consider widening HSV ranges slightly.")
         
-        if highlighted_pixels > 0:
-            masked_hsv = hsv_img[red_mask > 0]
+        if highlighted_pixels > 0 and log.enabled(TRACE):
+            masked_hsv = cv2.cvtColor(img_np, cv2.COLOR_RGB2HSV)[red_mask > 0]
             if len(masked_hsv) > 0:
                 avg_h = np.mean(masked_hsv[:,0])
                 avg_s = np.mean(masked_hsv[:,1])
                 avg_v = np.mean(masked_hsv[:,2])
-                print(f"Feather HSV avg (for tuning): H={avg_h:.1f}, S={avg_s:.1f}, V={avg_v:.1f}")
+                log.trace("cast", "Feather HSV avg (for tuning): H=%.1f, S=%.1f, V=%.1f", avg_h, avg_s, avg_v)
         
         if highlighted_pixels == 0:
-            hues = hsv_img[:,:,0].flatten()
-            print(f"DEBUG: Max hue in screenshot: {np.max(hues)}")
-        
-        # Debug: white feather on black background
-        debug_vis = np.zeros_like(img_np)
-        debug_vis[red_mask > 0] = [255, 255, 255]
+            hues = cv2.cvtColor(img_np, cv2.COLOR_RGB2HSV)[:,:,0].flatten()
+            log.debug("cast", "Max hue in screenshot: %d", np.max(hues))
         
-        masked_fn = os.path.join(SAVE_DIR, "latest_masked.png")
-        if cv2.imwrite(masked_fn, cv2.cvtColor(debug_vis, cv2.COLOR_RGB2BGR)):
-            print(f"📸 MASK DEBUG (white = detected feather): {masked_fn}")
-        
-        img_gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
         matches = []
-        for template, fname in templates:
-            template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-            if template_gray.shape[0] > SCREENSHOT_REGION["height"] or template_gray.shape[1] > SCREENSHOT_REGION["width"]:
-                continue
-            result = cv2.matchTemplate(img_gray, template_gray, cv2.TM_SQDIFF_NORMED)
-            min_val, _, min_loc, _ = cv2.minMaxLoc(result)
+        if not CANDIDATE_PREFILTER:
+            blobs = None
+        elif blobs is None:
+            stage = metrics.start()
+            blobs = bobber_blobs(red_mask)
+            metrics.stop("candidates", stage)
+            log.debug("cast", "Candidate blobs: %d", len(blobs))
+        stage = metrics.start()
+        # Most successful templates first, so early exit usually happens within the first few
+        ordered = template_library.hit_rate_order(templates) if EARLY_EXIT_SCORE > 0 else templates
+        red_integral = mask_integral(red_mask)
+        strong = []
+        tried_names = []
+        match_source = match_pool.iter_matches if match_pool is not None else iter_matches
+        results = match_source(img_gray, ordered, blobs, BOBBER_AREA_BOUNDS, PYRAMID_SCALE, PYRAMID_TOP_K, SQDIFF_ACCEPT)
+        for template, min_val, min_loc in results:
+            fname = template.name
+            tried_names.append(fname)
             if min_val < SQDIFF_ACCEPT:
-                h, w = template_gray.shape
-                match_mask = red_mask[min_loc[1]:min_loc[1]+h, min_loc[0]:min_loc[0]+w]
-                red_in_match = cv2.countNonZero(match_mask)
+                min_val = float(min_val)
+                h, w = template.shape
+                min_loc = (int(min_loc[0]), int(min_loc[1]))
+                red_in_match = int(count_in_windows(red_mask, [min_loc], [template.shape], red_integral)[0])
                 center_x = min_loc[0] + w // 2
                 center_y = min_loc[1] + h // 2
                 if red_in_match >= MIN_RED_PIXELS_FOR_MATCH and BOBBER_AREA_BOUNDS["min_x"] <= center_x <= BOBBER_AREA_BOUNDS["max_x"] and BOBBER_AREA_BOUNDS["min_y"] <= center_y <= BOBBER_AREA_BOUNDS["max_y"]:
                     matches.append((min_val, center_x, center_y, fname, red_in_match))
-                    print(f"✅ Accepted match from {fname}: score {min_val:.3f}, red pixels {red_in_match}, pos ({center_x}, {center_y})")
+                    log.trace("template", "✅ Accepted match from %s: score %.3f, red pixels %d, pos (%d, %d)",
+                              fname, min_val, red_in_match, center_x, center_y)
+                    if min_val <= EARLY_EXIT_SCORE:
+                        strong.append((center_x, center_y))
+                        near = sum(1 for sx, sy in strong
+                                   if abs(sx - center_x) <= POSITION_AGREEMENT_PX and abs(sy - center_y) <= POSITION_AGREEMENT_PX)
+                        if near >= MIN_AGREEING_TEMPLATES:
+                            break
                 else:
-                    print(f"❌ Discarded match from {fname}: only {red_in_match} red pixels (need >= {MIN_RED_PIXELS_FOR_MATCH})")
-        
-        cast_fn = os.path.join(SAVE_DIR, "latest_cast.png")
-        if cv2.imwrite(cast_fn, cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)):
-            print(f"📸 Raw cast saved: {cast_fn}")
+                    log.trace("template", "❌ Discarded match from %s: only %d red pixels (need >= %d)",
+                              fname, red_in_match, MIN_RED_PIXELS_FOR_MATCH)
+        results.close()  # stops pool workers still matching after an early exit
+        metrics.stop("match", stage)
+        template_library.record_tries(tried_names)
+        template_library.save_stats_if_due()
+        metrics.inc("templates_tried", len(tried_names))
+        log.debug("cast", "Templates tried: %d of %d", len(tried_names), len(templates))
         
         if not matches:
-            print("❌ No matches found (after red pixel filter)")
+            log.warning("lock", "❌ No matches found (after red pixel filter)")
+            queue_debug_artifacts(img_np, red_mask, False)
             return False, None, None, img_np, None
         
         # Sort by min_val (lower = better), then by red pixels descending
         matches.sort(key=lambda x: (x[0], -x[4]))
         best_score, best_x, best_y, best_fname, best_red = matches[0]
-        print(f"Best match: {best_score:.3f} from {best_fname} with {best_red} red pixels")
+        log.debug("lock", "Best match: %.3f from %s with %d red pixels", best_score, best_fname, best_red)
         
         agreeing = [m for m in matches if abs(m[1] - best_x) <= POSITION_AGREEMENT_PX and abs(m[2] - best_y) <= POSITION_AGREEMENT_PX]
         agree_count = len(agreeing)
-        print(f"🔍 {agree_count} templates agree near ({best_x}, {best_y})")
+        log.info("lock", f"🔍 {agree_count} templates agree near ({best_x}, {best_y})", matches=len(matches))
         
         latest_success_path = None
         
         if agree_count >= MIN_AGREEING_TEMPLATES:
-            print(f"🪝 Bobber LOCKED at ({best_x}, {best_y})")
+            log.info("lock", f"🪝 Bobber LOCKED at ({best_x}, {best_y})", score=f"{best_score:.3f}")
+            template_library.record_match([m[3] for m in agreeing])
             
             crop = img_np[max(0, best_y - BOBBER_CROP_SIZE//2):best_y + BOBBER_CROP_SIZE//2,
                           max(0, best_x - BOBBER_CROP_SIZE//2):best_x + BOBBER_CROP_SIZE//2]
             if crop.size > 0:
-                ts = time.strftime("%Y%m%d_%H%M%S")
-                path = os.path.join(TEMPLATE_DIR, f"bobber_success_{ts}.png")
-                cv2.imwrite(path, cv2.cvtColor(crop, cv2.COLOR_RGB2BGR))
-                print(f"💾 Auto-saved: {path}")
-                latest_success_path = path
-            
-            if DEBUG:
-                marked_img = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-                for _, ax, ay, afname, _ in agreeing:
-                    cv2.circle(marked_img, (ax, ay), 10, (0, 0, 255), 2)
-                    short_name = os.path.splitext(afname)[0][:12]
-                    cv2.putText(marked_img, short_name, (ax + 12, ay), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-                cv2.circle(marked_img, (best_x, best_y), 15, (0, 255, 0), 3)
-                cv2.rectangle(marked_img,
-                              (BOBBER_AREA_BOUNDS["min_x"], BOBBER_AREA_BOUNDS["min_y"]),
-                              (BOBBER_AREA_BOUNDS["max_x"], BOBBER_AREA_BOUNDS["max_y"]),
-                              (255, 0, 0), 2)
-                comparison_fn = os.path.join(SAVE_DIR, "latest_comparison.png")
-                if cv2.imwrite(comparison_fn, marked_img):
-                    print(f"📸 Comparison debug saved: {comparison_fn}")
+                crop_bgr = cv2.cvtColor(crop, cv2.COLOR_RGB2BGR)
+                duplicate = template_library.find_duplicate(cv2.cvtColor(crop_bgr, cv2.COLOR_BGR2GRAY))
+                if duplicate:
+                    log.debug("template", f"♻️ Skipped auto-save, crop duplicates {duplicate}")
+                else:
+                    ts = time.strftime("%Y%m%d_%H%M%S")
+                    path = os.path.join(template_bank.template_dir, f"bobber_success_{ts}.png")
+                    if cv2.imwrite(path, crop_bgr):
+                        template_bank.add(path, crop_bgr)
+                        log.info("template", f"💾 Auto-saved: {path}")
+                        latest_success_path = path
+                        template_library.prune()
+            queue_debug_artifacts(img_np, red_mask, True, agreeing, best_x, best_y)
             
             return True, best_x, best_y, img_np, latest_success_path
         else:
-            print(f"⚠️ Not enough agreement ({agree_count}/{MIN_AGREEING_TEMPLATES})")
+            log.warning("lock", f"⚠️ Not enough agreement ({agree_count}/{MIN_AGREEING_TEMPLATES})")
+            queue_debug_artifacts(img_np, red_mask, False)
             return False, None, None, img_np, None
     except Exception as e:
-        print(f"❌ find_bobber error: {e}")
+        log.error("cast", f"❌ find_bobber error: {e}")
         return False, None, None, None, None
 
 def detect_splash(img, initial_x, initial_y):
     global last_intensity_print, initial_intensity
-    img_np = np.array(img)
+    img_np = np.asarray(img)
     crop_left = max(0, initial_x - BOBBER_CROP_SIZE // 2)
     crop_top = max(0, initial_y - BOBBER_CROP_SIZE // 2)
     crop = img_np[crop_top:min(img_np.shape[0], initial_y + BOBBER_CROP_SIZE // 2),
                   crop_left:min(img_np.shape[1], initial_x + BOBBER_CROP_SIZE // 2)]
     if crop.size == 0:
         return False
-    crop_gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+    if SPLASH_DETECTOR == "adaptive":
+        splash = splash_detector.update(crop)
+        if time.time() - last_intensity_print >= 2.0:
+            log.debug("splash", "🌊 Splash z: brightness %.2f, motion %.2f, whitewater %.2f", *splash_detector.last_z)
+            last_intensity_print = time.time()
+        return splash
+    crop_gray = to_gray(crop)
     current = np.mean(crop_gray)
     if initial_intensity is None:
         initial_intensity = current
         return False
     delta = abs(current - initial_intensity)
     if time.time() - last_intensity_print >= 2.0:
-        print(f"🌊 Intensity Δ: {delta:.2f}")
+        log.debug("splash", "🌊 Intensity Δ: %.2f", delta)
         last_intensity_print = time.time()
     return delta > INTENSITY_CHANGE_THRESHOLD
 
+def splash_baseline_ready():
+    if SPLASH_DETECTOR == "adaptive":
+        return splash_detector.ready
+    return initial_intensity is not None
+
+def bobber_roi(x, y):
+    # Small screen region around the locked bobber, plus the bobber position inside it
+    half = BOBBER_CROP_SIZE // 2 + MONITOR_ROI_PADDING
+    left = max(0, x - half)
+    top = max(0, y - half)
+    right = min(SCREENSHOT_REGION["width"], x + half)
+    bottom = min(SCREENSHOT_REGION["height"], y + half)
+    region = {"left": SCREENSHOT_REGION["left"] + left, "top": SCREENSHOT_REGION["top"] + top,
+              "width": right - left, "height": bottom - top}
+    return region, x - left, y - top
+
 def save_bobber_template(img, x, y):
-    img_np = np.array(img)
+    img_np = np.asarray(img)
     crop = img_np[max(0, y - BOBBER_CROP_SIZE//2):y + BOBBER_CROP_SIZE//2,
                   max(0, x - BOBBER_CROP_SIZE//2):x + BOBBER_CROP_SIZE//2]
     if crop.size > 0:
         ts = time.strftime("%Y%m%d_%H%M%S")
-        path = os.path.join(TEMPLATE_DIR, f"bobber_manual_{ts}.png")
-        cv2.imwrite(path, cv2.cvtColor(crop, cv2.COLOR_RGB2BGR))
-        print(f"💾 Saved MANUAL template: {path}")
+        path = os.path.join(template_bank.template_dir, f"bobber_manual_{ts}.png")
+        crop_bgr = to_bgr(crop)
+        if cv2.imwrite(path, crop_bgr):
+            template_bank.add(path, crop_bgr)
+            log.info("template", f"💾 Saved MANUAL template: {path}")
 
 def toggle_pause():
-    global paused
-    paused = not paused
-    print(f"{'▶ Resumed' if not paused else '⏸ Paused'}")
+    if control.paused:
+        control.resume()
+    else:
+        control.pause()
+    log.info("control", f"{'⏸ Paused' if control.paused else '▶ Resumed'}")
 
 def emergency_keys_listener():
+    import keyboard  # live-only: global hotkeys
     def pause_on_key():
-        global paused
-        paused = True
-        print("⏸ Paused by movement key")
+        control.pause()
+        log.info("control", "⏸ Paused by movement key")
     keyboard.add_hotkey('w', pause_on_key)
     keyboard.add_hotkey('a', pause_on_key)
     keyboard.add_hotkey('s', pause_on_key)
     keyboard.add_hotkey('d', pause_on_key)
     keyboard.add_hotkey('space', pause_on_key)
     keyboard.add_hotkey('ctrl+shift', toggle_pause)
-    print("🛑 WASD/Space = quick pause | Ctrl+Shift = toggle pause/resume")
+    log.info("control", "🛑 WASD/Space = quick pause | Ctrl+Shift = toggle pause/resume | N = recast while monitoring")
 
 # ====================================================
 # MAIN FISHING CYCLE
 # ====================================================
+def acquire_bobber(cast_time):
+    """
+    Stream frames after a cast and lock on as soon as the bobber has landed.
+
+    Each poll runs only the cheap presence check (colour mask and candidate
+    blobs inside BOBBER_AREA_BOUNDS). Once every blob has held still for
+    ACQUIRE_SETTLE_FRAMES polls, the same mask and blobs go to find_bobber.
+    A failed match is retried after the next settle, up to ACQUIRE_RETRIES
+    times within ACQUIRE_TIMEOUT. If nothing has settled by
+    ACQUIRE_UNSETTLED_AFTER (a bobber that keeps bobbing more than
+    ACQUIRE_SETTLE_PX), the current frame is matched anyway, and so is the
+    last frame if no match was tried at all. Returns find_bobber's result, or None once
+    the frame source is exhausted. A pause or stop ends the waits early.
+    """
+    result = (False, None, None, None, None)
+    if not scheduler.wait_until(cast_time + ACQUIRE_MIN_WAIT):
+        return result
+    previous = []
+    at_rest = 0
+    attempts = 0
+    polls = 0
+    img_np = red_mask = blobs = None
+    next_poll = input_sink.now()
+    while attempts < ACQUIRE_RETRIES and input_sink.now() - cast_time < ACQUIRE_TIMEOUT:
+        with metrics.timer("capture"):
+            img = frame_source.grab_rgb(SCREENSHOT_REGION)
+        if img is None:
+            return None
+        polls += 1
+        img_np = np.asarray(img)
+        with metrics.timer("presence"):
+            red_mask = bobber_mask(img_np)
+            blobs = bobber_blobs(red_mask)
+            centers = blob_centers(blobs)
+        at_rest = at_rest + 1 if blobs_at_rest(centers, previous) else 0
+        previous = centers
+        log.trace("cast", "Acquire poll %d: %d blobs, at rest for %d", polls, len(centers), at_rest)
+        unsettled = attempts == 0 and input_sink.now() - cast_time >= ACQUIRE_UNSETTLED_AFTER
+        if at_rest >= ACQUIRE_SETTLE_FRAMES or unsettled:
+            attempts += 1
+            with metrics.timer("lock"):
+                result = find_bobber(img_np, red_mask, blobs)
+            if result[0]:
+                break
+            at_rest = 0
+        next_poll += ACQUIRE_INTERVAL
+        if not scheduler.wait_until(next_poll):
+            break
+    if attempts == 0 and img_np is not None and not control.interrupted:
+        attempts = 1
+        with metrics.timer("lock"):
+            result = find_bobber(img_np, red_mask, blobs)
+    metrics.inc("acquire_polls", polls)
+    metrics.inc("lock_attempts", attempts)
+    log.debug("cast", "Acquisition: %d polls, %d full matches, %.2fs after cast",
+              polls, attempts, input_sink.now() - cast_time)
+    return result
+
+def state_idle():
+    global last_time_print
+    if control.paused:
+        return "PAUSED"
+    if input_sink.now() - session_start > SESSION_LIMIT:
+        log.info("session", "⏰ Session limit reached.")
+        return None
+    if input_sink.now() - last_time_print >= 15:
+        rem = max(0, SESSION_LIMIT - (input_sink.now() - session_start))
+        h, m, s = int(rem // 3600), int((rem % 3600) // 60), int(rem % 60)
+        log.info("session", f"⏳ Remaining: {h:02d}:{m:02d}:{s:02d}")
+        last_time_print = input_sink.now()
+    return "FOCUS"
+
+def state_focus():
+    log.info("cast", "🎣 Casting...")
+    metrics.inc("casts")
+    log.debug("cast", "  → Forcing WoW window focus...")
+    input_sink.focus_game()
+    scheduler.wait(0.3)
+    return "CAST"
+
+def state_cast():
+    global cast_count
+    input_sink.key_down('9')
+    input_sink.wait(random.uniform(0.07, 0.12))  # not preemptible: the key always gets released
+    input_sink.key_up('9')
+    cast_count += 1
+    cycle.clear()
+    cycle["cast_time"] = input_sink.now()
+    return "ACQUIRE"
+
+def state_acquire():
+    log.debug("capture", "Waiting for the bobber to land...")
+    acquired = acquire_bobber(cycle["cast_time"])
+    if acquired is None:
+        log.info("session", "📼 Frame source exhausted")
+        return None
+    if control.interrupted:
+        return "COOLDOWN"
+    found, x, y, _, latest_success_path = acquired
+    metrics.inc("locks" if found else "lock_failures")
+    if not found:
+        return "COOLDOWN"
+    cycle.update(x=x, y=y, latest_success_path=latest_success_path)
+    return "MONITOR"
+
+def state_monitor():
+    global initial_intensity
+    x, y, latest_success_path = cycle["x"], cycle["y"], cycle["latest_success_path"]
+    roi, roi_x, roi_y = bobber_roi(x, y)
+    log.info("monitor", f"🪝 Monitoring bobber at ({x}, {y}) | ROI {roi['width']}x{roi['height']}")
+    initial_intensity = None
+    splash_detector.reset()
+    change_gate.reset()
+    confirmation_frames = ADAPTIVE_CONFIRMATION_FRAMES if SPLASH_DETECTOR == "adaptive" else CONFIRMATION_FRAMES
+    local_start = input_sink.now()
+    splash_count = 0
+    splash_detected = False
+    track_x, track_y = roi_x, roi_y  # the bobber (click target)
+    crop_x, crop_y = roi_x, roi_y    # centre of the splash crop, kept inside the ROI by the tracker
+    tracking = None
+    if MONITOR_PIPELINE:
+        feed = ThreadedFrameFeed(frame_source, roi, INTERVAL, PIPELINE_RING_SIZE)
+    else:
+        feed = InlineFrameFeed(frame_source, roi, INTERVAL, input_sink)
+    feed.start()
+    try:
+        while input_sink.now() - local_start < TIMEOUT:
+            if input_sink.is_pressed('n'):
+                log.info("recast", "🔄 Manual recast (N pressed)")
+                metrics.inc("manual_recasts")
+                if latest_success_path and os.path.exists(latest_success_path):
+                    try:
+                        os.remove(latest_success_path)
+                        template_bank.discard(latest_success_path)
+                        template_library.forget(latest_success_path)
+                        log.info("template", f"🗑️ Deleted unwanted success template: {latest_success_path}")
+                    except Exception as e:
+                        log.warning("template", f"⚠️ Failed to delete {latest_success_path}: {e}")
+                return "COOLDOWN"
+            if control.interrupted:
+                return "COOLDOWN"
+            frame = feed.next_frame(timeout=1.0)
+            if frame is None:
+                if feed.closed:
+                    log.info("session", "📼 Frame source exhausted")
+                    return None
+                continue
+            seq, frame_time, img = frame
+            if TRACK_BOBBER and tracking is None:
+                track_x, track_y = tracking = bobber_tracker.start(img, roi_x, roi_y)
+                crop_x, crop_y = bobber_tracker.center
+            if input_sink.is_pressed('y'):
+                save_bobber_template(img, track_x, track_y)
+            # A frame that looks like the last analysed one keeps that frame's verdict and bobber position.
+            # The gate stays open until the detector has a baseline to compare against.
+            if not CHANGE_GATE or change_gate.changed(img, force=not splash_baseline_ready()):
+                with metrics.timer("splash"):
+                    splash_detected = detect_splash(img, crop_x, crop_y)
+                if TRACK_BOBBER and not splash_detected and splash_count == 0:
+                    # Only quiet frames move the tracker, so a splash can't pull the crop or the click off the bobber
+                    with metrics.timer("track"):
+                        track_x, track_y = bobber_tracker.update(img)
+                        crop_x, crop_y = bobber_tracker.center
+                    log.trace("monitor", "Bobber at (%d, %d) score %.3f", track_x, track_y, bobber_tracker.score)
+            if splash_detected:
+                splash_count += 1
+                log.info("splash", f"🌊 Splash detected ({splash_count}/{confirmation_frames})")
+                if splash_count >= confirmation_frames:
+                    abs_x = roi["left"] + track_x
+                    abs_y = roi["top"] + track_y
+                    log.info("bite", "🎯 BITE! Right-clicking", x=abs_x, y=abs_y)
+                    metrics.inc("bites")
+                    actuator.submit(click_bite, abs_x, abs_y, feed, frame_time)
+                    return "HOOK"
+            else:
+                splash_count = 0
+    finally:
+        feed.stop()
+        if tracking is not None and (track_x, track_y) != tracking:
+            log.debug("monitor", "Bobber tracked", moved_x=track_x - tracking[0], moved_y=track_y - tracking[1])
+        frame_stats = feed.stats()
+        if CHANGE_GATE:
+            frame_stats.update(change_gate.stats())
+        log.debug("monitor", "Monitor frames", **frame_stats)
+        for name, count in frame_stats.items():
+            metrics.inc(f"frames_{name}", count)
+    log.info("timeout", "⏳ Timeout → recast")
+    metrics.inc("timeouts")
+    return "COOLDOWN"
+
+def state_hook():
+    # The click was queued the moment the bite was confirmed; hold the next cast until it and the move-away are done
+    actuator.wait_idle()
+    return "COOLDOWN"
+
+def publish_drop_counts():
+    # Log records and debug artifacts the background writers dropped since the last cast
+    totals = {"log_records_dropped": dropped_records(), "artifacts_dropped": artifact_writer.dropped}
+    for name, total in totals.items():
+        metrics.inc(name, total - published_drops.get(name, 0))
+        published_drops[name] = total
+
+def state_cooldown():
+    publish_drop_counts()
+    if input_sink.now() - break_start_time >= BREAK_START_DELAY and random.random() < RANDOM_BREAK_CHANCE:
+        return "BREAK"
+    log.debug("cast", "─── Cycle done ───")
+    return "IDLE"
+
+def state_break():
+    global break_start_time
+    dur = random.uniform(*RANDOM_BREAK_LENGTH)
+    log.info("break", f"☕ Taking human break: {dur:.1f}s")
+    scheduler.wait(dur)
+    break_start_time = input_sink.now()
+    return "IDLE"
+
+def state_paused():
+    while not control.wait_resumed(0.5):
+        if control.stopped:
+            return None
+    return "IDLE"
+
+def handle_interrupt(next_state):
+    # Pause/stop arrived during a state (its waits have already returned early)
+    control.clear_interrupt()
+    if control.stopped or next_state is None:
+        return None
+    if control.paused:
+        return "PAUSED"
+    return next_state
+
 def fishing_cycle():
-    global running, paused, initial_intensity, break_start_time, last_intensity_print, last_time_print
-    
-    start_time = time.time()
-    break_start_time = time.time()
+    """
+    Fish until the session limit, a stop, or the end of the frame source.
+
+    Each cast runs IDLE → FOCUS → CAST → ACQUIRE → MONITOR → HOOK → COOLDOWN,
+    with BREAK after COOLDOWN now and then. A failed lock or a timeout goes
+    straight to COOLDOWN. Waits are deadlines on the input sink's clock
+    (see Core/Scheduler.py), and a pause or stop cuts them short; N only
+    recasts while monitoring. Time spent in each state goes to the
+    state_<name> metrics.
+    """
+    global scheduler, session_start, break_start_time, last_intensity_print, last_time_print
+    scheduler = Scheduler(input_sink, control)
+    session_start = break_start_time = last_time_print = input_sink.now()
     last_intensity_print = time.time()
-    last_time_print = time.time()
-    
-    while running:
-        if paused:
-            time.sleep(0.5)
-            continue
-        if time.time() - start_time > SESSION_LIMIT:
-            print("⏰ Session limit reached.")
-            running = False
-            return
-        if time.time() - last_time_print >= 15:
-            rem = max(0, SESSION_LIMIT - (time.time() - start_time))
-            h, m, s = int(rem // 3600), int((rem % 3600) // 60), int(rem % 60)
-            print(f"⏳ Remaining: {h:02d}:{m:02d}:{s:02d}")
-            last_time_print = time.time()
-        
-        print("🎣 Casting...")
-        print("  → Forcing WoW window focus...")
-        activate_wow_window()
-        time.sleep(0.3)
-        pydirectinput.keyDown('9')
-        time.sleep(random.uniform(0.07, 0.12))
-        pydirectinput.keyUp('9')
-        time.sleep(random.uniform(1.8, 2.6))
-        print("Capturing...")
-        
-        with mss.mss() as sct:
-            sct_img = sct.grab(SCREENSHOT_REGION)
-            img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
-        
-        found, x, y, img_np, latest_success_path = find_bobber(img)
-        
-        if found:
-            print(f"🪝 Monitoring bobber at ({x}, {y})")
-            initial_intensity = None
-            local_start = time.time()
-            splash_count = 0
-            while time.time() - local_start < TIMEOUT and not paused:
-                if keyboard.is_pressed('n'):
-                    print("🔄 Manual recast (N pressed)")
-                    if latest_success_path and os.path.exists(latest_success_path):
-                        try:
-                            os.remove(latest_success_path)
-                            print(f"🗑️ Deleted unwanted success template: {latest_success_path}")
-                        except Exception as e:
-                            print(f"⚠️ Failed to delete {latest_success_path}: {e}")
-                    break
-                if keyboard.is_pressed('y'):
-                    save_bobber_template(img, x, y)
-                with mss.mss() as sct:
-                    sct_img = sct.grab(SCREENSHOT_REGION)
-                    img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
-                splash_detected = detect_splash(img, x, y)
-                if splash_detected:
-                    splash_count += 1
-                    print(f"🌊 Splash detected ({splash_count}/{CONFIRMATION_FRAMES})")
-                    if splash_count >= CONFIRMATION_FRAMES:
-                        abs_x = SCREENSHOT_REGION["left"] + x
-                        abs_y = SCREENSHOT_REGION["top"] + y
-                        print("🎯 BITE! Right-clicking")
-                        pyautogui.moveTo(abs_x, abs_y, duration=MOUSE_MOVE_DURATION)
-                        pyautogui.rightClick()
-                        ex, ey = get_random_edge_point()
-                        pyautogui.moveTo(SCREENSHOT_REGION["left"] + ex, SCREENSHOT_REGION["top"] + ey, duration=MOUSE_MOVE_DURATION)
-                        break
-                else:
-                    splash_count = 0
-                time.sleep(INTERVAL)
-            if splash_count < CONFIRMATION_FRAMES:
-                print("⏳ Timeout → recast")
-        
-        if time.time() - break_start_time >= BREAK_START_DELAY and random.random() < RANDOM_BREAK_CHANCE:
-            dur = random.uniform(*RANDOM_BREAK_LENGTH)
-            print(f"☕ Taking human break: {dur:.1f}s")
-            time.sleep(dur)
-            break_start_time = time.time()
-        
-        print("─── Cycle done ───\n")
+    StateMachine({
+        "IDLE": state_idle,
+        "FOCUS": state_focus,
+        "CAST": state_cast,
+        "ACQUIRE": state_acquire,
+        "MONITOR": state_monitor,
+        "HOOK": state_hook,
+        "COOLDOWN": state_cooldown,
+        "BREAK": state_break,
+        "PAUSED": state_paused,
+    }, "IDLE", control, handle_interrupt).run()
+
+def click_bite(abs_x, abs_y, feed, frame_time):
+    # Runs on the actuator thread
+    with metrics.timer("click"):
+        input_sink.move_to(abs_x, abs_y, duration=MOUSE_MOVE_DURATION)
+        input_sink.right_click()
+    latency = feed.now() - frame_time
+    metrics.observe("bite_to_click", latency)
+    log.debug("bite", "Clicked", latency_ms=round(latency * 1000, 1))
+    ex, ey = get_random_edge_point()
+    input_sink.move_to(SCREENSHOT_REGION["left"] + ex, SCREENSHOT_REGION["top"] + ey, duration=MOUSE_MOVE_DURATION)
 
 def get_random_edge_point():
     edge = random.choice(['top', 'bottom', 'left', 'right'])
@@ -382,28 +713,41 @@ def get_random_edge_point():
     return b["max_x"], random.uniform(b["min_y"], b["max_y"])
 
 def start_fishing_thread():
-    global running, paused
+    import keyboard  # live-only: global hotkeys
     emergency_keys_listener()
-    while True:
+    while not control.stopped:
         keyboard.wait('ctrl+shift')
-        running = True
-        paused = False
-        print("▶ AutoFish started / resumed")
+        control.resume()
+        log.info("control", "▶ AutoFish started / resumed")
         fishing_cycle()
 
 def main():
-    global running, paused
+    global frame_source, input_sink
+    setup_logging(LOG_LEVEL)
+    setup_metrics(METRICS_ENABLED, METRICS_PORT, METRICS_SNAPSHOT_PATH, METRICS_SNAPSHOT_INTERVAL)
+    input_sink = LiveInputSink()
+    input_sink.print_window_titles()
+    frame_source = LiveFrameSource()
     ensure_save_dir()
-    print("🚀 AutoFish ready | Ctrl+Shift = start/resume | WASD/Space = quick pause")
-    print("   Press 'y' during monitoring to save new template manually")
+    init_templates()
+    color_classifier.compile()  # build the colour table now rather than inside the first cast
+    log.info("session", "🚀 AutoFish ready | Ctrl+Shift = start/resume | WASD/Space = quick pause")
+    log.info("session", "   Press 'y' during monitoring to save new template manually")
     thread = threading.Thread(target=start_fishing_thread, daemon=True)
     thread.start()
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        running = False
-        print("\n👋 Shutting down...")
+        control.stop()
+        frame_source.close()
+        artifact_writer.close()
+        template_bank.save_cache()
+        template_library.save_stats()
+        publish_drop_counts()
+        shutdown_metrics()
+        log.info("session", "👋 Shutting down...")
+        shutdown_logging()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file